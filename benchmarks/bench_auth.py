@@ -0,0 +1,108 @@
+"""Login throughput and authenticated request overhead per session/auth setup.
+
+    python benchmarks/bench_auth.py [--logins 20] [--requests 300] [--path /]
+
+Runs against a throwaway test database created from DJANGO_SETTINGS_MODULE.
+Logins are timed per password hashing policy (hashing dominates them); the
+authenticated page is timed and its queries counted per session engine, with
+the plain and the cached ModelBackend.
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gaming.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.hashers import get_hashers, get_hashers_by_algorithm  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+
+PASSWORD = 'bench-Password-123'
+HASHER_POLICIES = (
+    ('pbkdf2 (Django default)', 'gamingapp.hashers.ConfigurablePBKDF2PasswordHasher', None),
+    ('pbkdf2 260k', 'gamingapp.hashers.ConfigurablePBKDF2PasswordHasher', 260000),
+    ('scrypt', 'django.contrib.auth.hashers.ScryptPasswordHasher', None),
+)
+SESSION_MODES = ('db', 'cached_db', 'cache', 'signed_cookies')
+BACKENDS = (
+    ('ModelBackend', 'django.contrib.auth.backends.ModelBackend'),
+    ('CachedModelBackend', 'gamingapp.auth_backends.CachedModelBackend'),
+)
+
+
+def reset_hashers():
+    get_hashers.cache_clear()
+    get_hashers_by_algorithm.cache_clear()
+
+
+def bench_logins(logins):
+    print(f"{'hasher':<26}{'ms/login':>10}{'logins/s':>10}")
+    for name, hasher, iterations in HASHER_POLICIES:
+        with override_settings(PASSWORD_HASHERS=[hasher], PASSWORD_PBKDF2_ITERATIONS=iterations):
+            reset_hashers()
+            user = User.objects.create_user(username=f'login-{len(name)}-{iterations}', password=PASSWORD)
+            client = Client()
+            started = time.perf_counter()
+            for _ in range(logins):
+                client.login(username=user.username, password=PASSWORD)
+            per_login = (time.perf_counter() - started) / logins
+        reset_hashers()
+        print(f"{name:<26}{per_login * 1000:>10.1f}{1 / per_login:>10.1f}")
+
+
+def bench_requests(path, requests):
+    print(f"\n{'session engine':<16}{'backend':<20}{'mean ms':>9}{'p95 ms':>9}{'queries':>9}")
+    user = User.objects.create_user(username='bench-requests', password=PASSWORD)
+    for mode in SESSION_MODES:
+        for backend_name, backend in BACKENDS:
+            with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[mode], AUTHENTICATION_BACKENDS=[backend]):
+                for alias in caches:
+                    caches[alias].clear()
+                client = Client()
+                client.force_login(user, backend=backend)
+                client.get(path)
+                timings = []
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    client.get(path)
+                    timings.append(time.perf_counter() - started)
+                with CaptureQueriesContext(connection) as queries:
+                    client.get(path)
+            timings.sort()
+            print(f"{mode:<16}{backend_name:<20}{statistics.mean(timings) * 1000:>9.2f}"
+                  f"{timings[int(len(timings) * 0.95)] * 1000:>9.2f}{len(queries):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--path', default='/', help="A page that reads request.user.")
+    args = parser.parse_args()
+
+    logging.getLogger('gamingapp').setLevel(logging.WARNING)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        bench_logins(args.logins)
+        bench_requests(args.path, args.requests)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Latency, queries and memory of every page and API route on synthetic catalogs.
+
+    python benchmarks/bench_catalog.py [--sizes 1000,100000,1000000] [--iterations 20]
+                                       [--routes api-,store] [--compare benchmarks/results/<file>.json]
+
+For each size a throwaway test database is created from DJANGO_SETTINGS_MODULE
+and filled by `manage.py generate_catalog` (one store per 100 laptops, one
+review per 10). Every named GET route in gaming/urls.py is then requested
+as the owner of a store: p50/p95/p99 latency, queries per request and peak
+traced memory per request are printed and saved as JSON in
+benchmarks/results/. With --compare, changes against an earlier results file
+are printed as well.
+
+The response cache is bypassed unless --response-cache is given, so the
+views themselves are measured. Above --deals-max-laptops the BetterDeal table
+is not built (it grows with the square of the catalog), which leaves the
+lower-price pages empty at that size.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gaming.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from gamingapp.perf import measure, routes, sample_ids  # noqa: E402
+from gamingapp.synthetic import generate  # noqa: E402
+
+RESULTS_DIR = BASE_DIR / 'benchmarks' / 'results'
+COMPARED = ('p95_ms', 'queries', 'memory_peak_bytes')
+
+
+def dataset(size, deals_max_laptops, seed):
+    stores = max(1, size // 100)
+    reviews = size // 10
+    return generate(
+        users=max(stores, reviews), stores=stores, laptops=size, reviews=reviews,
+        seed=seed, deals=size <= deals_max_laptops,
+    )
+
+
+def run_size(size, args):
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        for alias in caches:
+            caches[alias].clear()
+        report = dataset(size, args.deals_max_laptops, args.seed)
+        print(f"\n{size} laptops: generated {report.as_dict()}")
+        ids = sample_ids()
+        # A route that fails is reported with its 500 rather than ending the run.
+        client = Client(raise_request_exception=False)
+        client.force_login(User.objects.get(pk=ids['owner']))
+
+        print(f"{'route':<28}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KiB':>10}")
+        results = {}
+        for name, path, query in routes(ids):
+            if args.routes and not any(part in name for part in args.routes):
+                continue
+            result = measure(client, path, query, args.iterations, args.memory_iterations)
+            results[name] = {'path': path, **result}
+            print(f"{name:<28}{result['status']:>7}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                  f"{result['p99_ms']:>9.2f}{result['queries']:>9}{result['memory_peak_bytes'] / 1024:>10.1f}")
+        return {'dataset': report.as_dict(), 'routes': results}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def compare(results, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())['sizes']
+    print(f"\nChanges against {baseline_path}:")
+    for size, data in results.items():
+        for name, result in data['routes'].items():
+            before = baseline.get(size, {}).get('routes', {}).get(name)
+            if before is None:
+                continue
+            changes = [
+                f"{metric} {before[metric]} -> {result[metric]}"
+                for metric in COMPARED
+                if before.get(metric) and result[metric] != before[metric]
+                and (metric == 'queries' or abs(result[metric] / before[metric] - 1) >= 0.1)
+            ]
+            if changes:
+                print(f"  {size:>8} {name:<28}{'; '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000,1000000', help="Comma-separated laptop counts.")
+    parser.add_argument('--iterations', type=int, default=20, help="Timed requests per route.")
+    parser.add_argument('--memory-iterations', type=int, default=3)
+    parser.add_argument('--routes', type=lambda value: value.split(','), help="Only routes whose name contains one of these.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--deals-max-laptops', type=int, default=10000)
+    parser.add_argument('--response-cache', action='store_true', help="Keep the response cache enabled.")
+    parser.add_argument('--output', type=Path, help="Results file; defaults to a timestamped file in benchmarks/results/.")
+    parser.add_argument('--compare', help="An earlier results file.")
+    args = parser.parse_args()
+
+    logging.getLogger('gamingapp').setLevel(logging.WARNING)
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    setup_test_environment()
+    overrides = {} if args.response_cache else {'RESPONSE_CACHE_TIMEOUT': 0}
+    with override_settings(**overrides):
+        results = {size: run_size(int(size), args) for size in args.sizes.split(',')}
+
+    output = args.output or RESULTS_DIR / f"catalog-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'iterations': args.iterations,
+            'response_cache': args.response_cache,
+        },
+        'sizes': results,
+    }, indent=2))
+    print(f"\nSaved {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Per-request latency with fresh database connections versus persistent ones.
+
+    python benchmarks/bench_db_pool.py [--path /stores/] [--requests 500]
+
+Requests go through the real WSGI handler, so Django closes or keeps the
+connection at the end of each request exactly as in production. Runs against
+the database configured by DJANGO_SETTINGS_MODULE.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gaming.settings')
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+application = get_wsgi_application()
+
+from django.db import connections  # noqa: E402
+from django.test.client import RequestFactory  # noqa: E402
+
+from gamingapp import db_pool  # noqa: E402
+
+
+def request_once(path):
+    environ = RequestFactory().get(path).environ
+    started = time.perf_counter()
+    response = application(environ, lambda status, headers: None)
+    b''.join(response)
+    response.close()  # fires request_finished, which closes or keeps the connection
+    return time.perf_counter() - started
+
+
+def run(path, requests, conn_max_age):
+    connections.close_all()
+    for alias in connections:
+        connections[alias].settings_dict['CONN_MAX_AGE'] = conn_max_age
+    opened_before = sum(db_pool._opened.values())
+    request_once(path)  # warm caches and templates
+    timings = sorted(request_once(path) for _ in range(requests))
+    opened = sum(db_pool._opened.values()) - opened_before
+    return timings, opened
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default='/stores/')
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'connections':>13}")
+    for mode, conn_max_age in (('per request', 0), ('persistent', 600)):
+        timings, opened = run(args.path, args.requests, conn_max_age)
+        p95 = timings[int(len(timings) * 0.95)]
+        print(f"{mode:<14}{statistics.mean(timings) * 1000:>10.2f}{statistics.median(timings) * 1000:>10.2f}"
+              f"{p95 * 1000:>10.2f}{opened:>13}")
+
+
+if __name__ == '__main__':
+    main()
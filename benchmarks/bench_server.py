@@ -0,0 +1,98 @@
+"""Requests per second of `manage.py runserver` versus the gunicorn launcher.
+
+    python benchmarks/bench_server.py [--path /stores/] [--concurrency 32] [--duration 15]
+
+Each server is started on its own port with the current environment (so
+DJANGO_SETTINGS_MODULE and database settings apply to both), loaded by
+--concurrency client threads for --duration seconds and then stopped.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'runserver': lambda port: [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{port}'],
+    'gunicorn': lambda port: ['gunicorn', '-c', 'gaming/gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+}
+
+
+def wait_until_live(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'{base_url}/healthz/live', timeout=1).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f'{base_url} did not come up within {timeout}s')
+
+
+def load(url, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                urllib.request.urlopen(url, timeout=10).read()
+                local.append(time.perf_counter() - started)
+            except (urllib.error.URLError, ConnectionError):
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default='/stores/')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    args = parser.parse_args()
+
+    print(f"{'server':<12}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for offset, name in enumerate(args.servers):
+        port = 18000 + offset
+        process = subprocess.Popen(
+            SERVERS[name](port), cwd=BASE_DIR, env=os.environ.copy(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            wait_until_live(base_url)
+            latencies, errors = load(base_url + args.path, args.concurrency, args.duration)
+        finally:
+            process.terminate()
+            process.wait()
+        latencies.sort()
+        if not latencies:
+            print(f"{name:<12}{'-':>10}{'-':>10}{'-':>10}{'-':>10}{errors:>8}")
+            continue
+        p = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000  # noqa: E731
+        print(f"{name:<12}{len(latencies) / args.duration:>10.1f}{statistics.median(latencies) * 1000:>10.1f}"
+              f"{p(0.95):>10.1f}{p(0.99):>10.1f}{errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
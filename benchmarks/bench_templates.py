@@ -0,0 +1,91 @@
+"""Render latency of store_list.html and search_laptops.html per template setup.
+
+    python benchmarks/bench_templates.py [--iterations 2000] [--rows 50]
+
+Compares the development setup (filesystem loaders, every render re-reads and
+re-parses the file) with the production one (cached loader over the bundle
+written by `manage.py bundle_templates`). No database is needed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gaming.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.template import Context, Engine  # noqa: E402
+
+from gamingapp.facets import FACET_RANGES, bucket_key  # noqa: E402
+
+
+def contexts(rows):
+    owner = SimpleNamespace(username='owner')
+    stores = [SimpleNamespace(id=i, title=f'Store {i}', user=owner) for i in range(rows)]
+    facets = {
+        field: [{'key': bucket_key(*bounds), 'count': rows, 'selected': False} for bounds in ranges]
+        for field, ranges in FACET_RANGES.items()
+    }
+    return {
+        'store_list.html': {'stores': stores},
+        'search_laptops.html': {
+            'products': [f'Laptop {i}' for i in range(rows)],
+            'query': 'laptop',
+            'facets': facets,
+            'has_next': True,
+            'page': 1,
+            'filter_querystring': 'q=laptop',
+        },
+    }
+
+
+def engines(bundle_path):
+    templates_dir = str(BASE_DIR / 'templates')
+    return {
+        'filesystem': Engine(dirs=[templates_dir], loaders=['django.template.loaders.filesystem.Loader']),
+        'cached bundle': Engine(dirs=[templates_dir], loaders=[
+            ('django.template.loaders.cached.Loader', [
+                ('gamingapp.template_loaders.BundleLoader', bundle_path),
+            ]),
+        ]),
+    }
+
+
+def measure(engine, name, context, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        engine.get_template(name).render(Context(context))
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return statistics.mean(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        bundle_path = os.path.join(directory, 'templates.bundle.json')
+        call_command('bundle_templates', output=bundle_path, stdout=open(os.devnull, 'w'))
+        print(f"{'template':<22}{'setup':<16}{'mean us':>10}{'p50 us':>10}{'p95 us':>10}")
+        for setup, engine in engines(bundle_path).items():
+            for name, context in contexts(args.rows).items():
+                mean, p50, p95 = measure(engine, name, context, args.iterations)
+                print(f"{name:<22}{setup:<16}{mean * 1e6:>10.1f}{p50 * 1e6:>10.1f}{p95 * 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+import json
+from pathlib import Path
+
+import pytest
+
+# Performance budgets. Tests marked ``perf_budget(max_queries=..., max_ms=...,
+# max_memory_kb=...)`` request a route through the ``perf_budget`` fixture on
+# a synthetic catalog. The query count is deterministic and always checked,
+# both against the marker and against the baseline file (kept per database
+# backend): any extra query fails. Wall time and traced memory depend on the
+# machine, so they are only checked with --perf: against the marker, and
+# against the baseline with --perf-time-tolerance / --perf-memory-tolerance.
+# A table of every measured route against the baseline is printed at the end
+# of the run; --perf-update-baseline rewrites the file from this run's
+# measurements. A database backend without a baseline fails every perf_budget
+# test until one is recorded for it.
+#
+#     pytest -m perf_budget --perf                # query, time and memory budgets
+#     pytest -m perf_budget --perf-update-baseline
+
+BASELINE = Path(__file__).resolve().parent / 'benchmarks' / 'perf_baseline.json'
+PERF_DATASET = {'users': 80, 'stores': 5, 'laptops': 500, 'reviews': 50}
+PERF_ITERATIONS = 10
+# Below these differences a change is noise, whatever the ratio.
+TIME_SLACK_MS = 5.0
+MEMORY_SLACK_BYTES = 64 * 1024
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('perf', 'performance budgets')
+    group.addoption('--perf', action='store_true',
+                    help="Also check wall time and memory of the perf_budget tests, which depend on the machine.")
+    group.addoption('--perf-baseline', default=str(BASELINE), help="Baseline file of the perf_budget tests.")
+    group.addoption('--perf-update-baseline', action='store_true',
+                    help="Write this run's measurements to the baseline instead of comparing with it.")
+    group.addoption('--perf-time-tolerance', type=float, default=2.0,
+                    help="Largest allowed ratio of median wall time to the baseline; 0 disables the check.")
+    group.addoption('--perf-memory-tolerance', type=float, default=1.5,
+                    help="Largest allowed ratio of traced memory to the baseline; 0 disables the check.")
+
+
+class PerfReport:
+    """Measurements of this run and their comparison with the baseline file."""
+
+    def __init__(self, path, update, full, time_tolerance, memory_tolerance):
+        self.path = Path(path)
+        self.update = update
+        # Recording a baseline measures everything.
+        self.full = full or update
+        self.metrics = ('queries', 'p50_ms', 'memory_peak_bytes') if self.full else ('queries',)
+        self.time_tolerance = time_tolerance
+        self.memory_tolerance = memory_tolerance
+        self.saved = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self.results = {}
+        self.vendor = None
+
+    @property
+    def baseline(self):
+        # Query counts differ between database backends, e.g. full-text search.
+        return self.saved.get(self.vendor, {})
+
+    def rows(self, route, result):
+        """``(metric, baseline, current, regressed)`` for each compared metric."""
+        before = self.baseline.get(route)
+        if before is None:
+            return [(metric, None, result[metric], False) for metric in self.metrics]
+        regressed = {
+            'queries': lambda: result['queries'] > before['queries'],
+            'p50_ms': lambda: self._grew(before['p50_ms'], result['p50_ms'], self.time_tolerance, TIME_SLACK_MS),
+            'memory_peak_bytes': lambda: self._grew(
+                before['memory_peak_bytes'], result['memory_peak_bytes'], self.memory_tolerance, MEMORY_SLACK_BYTES,
+            ),
+        }
+        return [(metric, before[metric], result[metric], regressed[metric]()) for metric in self.metrics]
+
+    def missing(self):
+        return not self.update and not self.baseline
+
+    @staticmethod
+    def _grew(before, after, tolerance, slack):
+        return bool(tolerance) and after > before * tolerance and after - before > slack
+
+    def record(self, vendor, route, result):
+        """Store ``result`` and return the rows that regressed against the baseline."""
+        self.vendor = vendor
+        self.results[route] = result
+        if self.update:
+            return []
+        return [row for row in self.rows(route, result) if row[3]]
+
+    def save(self):
+        baseline = {**self.baseline, **{
+            route: {metric: result[metric] for metric in ('queries', 'p50_ms', 'memory_peak_bytes')}
+            for route, result in self.results.items()
+        }}
+        self.saved[self.vendor] = dict(sorted(baseline.items()))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.saved, indent=2, sort_keys=True) + '\n')
+
+
+def format_rows(route, rows):
+    lines = []
+    for metric, before, after, regressed in rows:
+        if before is None:
+            change = 'new'
+        elif before:
+            change = f'{(after - before) / before:+.0%}'
+        else:
+            change = f'{after - before:+g}'
+        flag = '  <-- regression' if regressed else ''
+        lines.append(f"{route:<24}{metric:<19}{'-' if before is None else before:>12}{after:>12}{change:>9}{flag}")
+    return lines
+
+
+def pytest_configure(config):
+    config.perf_report = PerfReport(
+        config.getoption('perf_baseline'),
+        config.getoption('perf_update_baseline'),
+        config.getoption('perf'),
+        config.getoption('perf_time_tolerance'),
+        config.getoption('perf_memory_tolerance'),
+    )
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    report = config.perf_report
+    if not report.results:
+        return
+    terminalreporter.section('performance budgets')
+    terminalreporter.write_line(f"{'route':<24}{'metric':<19}{'baseline':>12}{'current':>12}{'change':>9}")
+    for route, result in sorted(report.results.items()):
+        for line in format_rows(route, report.rows(route, result)):
+            terminalreporter.write_line(line)
+    if report.missing():
+        terminalreporter.write_line(
+            f"No {report.vendor} baseline in {report.path}. Record one with --perf-update-baseline.", red=True,
+        )
+    if report.update:
+        report.save()
+        terminalreporter.write_line(f"Baseline written to {report.path}.")
+
+
+@pytest.fixture
+def perf_catalog(db, settings, django_capture_on_commit_callbacks):
+    """A synthetic catalog and a client logged in as the owner of a store in it."""
+    from django.contrib.auth.models import User
+    from django.core.cache import caches
+    from django.test import Client
+
+    from gamingapp.perf import routes, sample_ids
+    from gamingapp.synthetic import generate
+
+    # Measure the views, not the response cache.
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    for alias in caches:
+        caches[alias].clear()
+    # The test transaction never commits; run the version bumps now.
+    with django_capture_on_commit_callbacks(execute=True):
+        generate(seed=0, **PERF_DATASET)
+    ids = sample_ids()
+    client = Client()
+    client.force_login(User.objects.get(pk=ids['owner']))
+    return client, {name: (path, query) for name, path, query in routes(ids)}
+
+
+@pytest.fixture
+def perf_budget(request, perf_catalog):
+    """Measure a route by name and fail if it is over budget or regressed.
+
+    The limits come from the test's ``perf_budget`` marker; all are optional.
+    ``max_ms`` and ``max_memory_kb`` are only checked with --perf.
+    """
+    from django.db import connection
+
+    from gamingapp.perf import measure
+
+    client, paths = perf_catalog
+    marker = request.node.get_closest_marker('perf_budget')
+    limits = marker.kwargs if marker else {}
+
+    def check(route):
+        report = request.config.perf_report
+        path, query = paths[route]
+        if report.full:
+            result = measure(client, path, query, iterations=PERF_ITERATIONS, memory_iterations=1)
+        else:
+            result = measure(client, path, query, iterations=0, memory_iterations=0)
+        assert result['status'] < 500, f"{route}: {path} answered {result['status']}"
+
+        failures = []
+        if limits.get('max_queries') is not None and result['queries'] > limits['max_queries']:
+            failures.append(f"{result['queries']} queries, budget {limits['max_queries']}")
+        if report.full and limits.get('max_ms') is not None and result['p50_ms'] > limits['max_ms']:
+            failures.append(f"median {result['p50_ms']:.1f} ms, budget {limits['max_ms']} ms")
+        if (report.full and limits.get('max_memory_kb') is not None
+                and result['memory_peak_bytes'] > limits['max_memory_kb'] * 1024):
+            failures.append(f"{result['memory_peak_bytes'] / 1024:.0f} KiB traced, budget {limits['max_memory_kb']} KiB")
+        regressions = report.record(connection.vendor, route, result)
+        if report.missing():
+            failures.append(
+                f"no {connection.vendor} baseline in {report.path.name}; record one with --perf-update-baseline",
+            )
+
+        if failures or regressions:
+            lines = [f"{route} ({path}) is over its performance budget:"]
+            lines.extend(f"  {failure}" for failure in failures)
+            if regressions:
+                lines.append(f"  regressed against {report.path.name}:")
+                lines.extend(f"    {line}" for line in format_rows(route, regressions))
+            pytest.fail('\n'.join(lines), pytrace=False)
+        return result
+
+    return check
@@ -0,0 +1,80 @@
+"""
+Gunicorn configuration for gaming project.
+
+    gunicorn -c gaming/gunicorn.conf.py
+
+Sized from the CPUs the container may use (its cgroup CPU quota, not the
+node's CPU count) and capped at GUNICORN_MAX_WORKERS, unless overridden by
+environment variables. With CONN_MAX_AGE every thread keeps its own database
+connection, so a pod holds up to workers * threads of them. Send
+SIGHUP to the master for a graceful reload; workers are recycled after
+GUNICORN_MAX_REQUESTS requests to bound memory growth. Set GUNICORN_ASGI=1 to
+serve gaming.asgi through uvicorn workers instead of threaded WSGI workers.
+"""
+
+import math
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _cgroup_quota():
+    """CPUs allowed by the cgroup quota, or None without a limit."""
+    try:
+        # cgroup v2: "<quota> <period>", or "max <period>".
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                quota = f.read().strip()
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ('max', '-1'):
+        return None
+    return int(quota) / int(period)
+
+
+def cpu_limit():
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    quota = _cgroup_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+cpus = cpu_limit()
+max_workers = _env_int('GUNICORN_MAX_WORKERS', 8)
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gaming.settings_production')
+
+bind = f"0.0.0.0:{_env_int('PORT', 15000)}"
+
+if os.environ.get('GUNICORN_ASGI') == '1':
+    wsgi_app = 'gaming.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = _env_int('WEB_CONCURRENCY', min(cpus + 1, max_workers))
+else:
+    wsgi_app = 'gaming.wsgi:application'
+    worker_class = 'gthread'
+    workers = _env_int('WEB_CONCURRENCY', min(cpus * 2 + 1, max_workers))
+    threads = _env_int('GUNICORN_THREADS', 4)
+
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Importing the app in the master would share compiled templates between
+# workers, but SIGHUP could then no longer pick up new code.
+preload_app = os.environ.get('GUNICORN_PRELOAD') == '1'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'gamingapp.middleware.MetricsMiddleware',
+    'gamingapp.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,7 +58,7 @@ ROOT_URLCONF = 'gaming.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'gamingapp.template_backends.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -69,6 +72,43 @@ TEMPLATES = [
     },
 ]
 
+# `default` is shared by every replica of the app when CACHE_URL points at
+# Redis (e.g. redis://cache:6379/0), otherwise it is per process. `local` is the
+# in-process L1 in front of it, used by gamingapp.response_cache.
+#
+# The catalog version stamps (gamingapp.catalog) live in `default`. They only
+# invalidate across gunicorn workers and replicas when it is shared, so
+# without CACHE_URL the response and facet caches are off by default: a write
+# would bump the stamp in one process and every other one would keep serving
+# what it cached. deployment.yaml runs Redis for this.
+SHARED_CACHE = bool(os.environ.get('CACHE_URL'))
+if SHARED_CACHE:
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_URL'],
+    }
+else:
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+
+CACHES = {
+    'default': DEFAULT_CACHE,
+    'local': {
+        'BACKEND': 'gamingapp.cache_backends.LocalLRUCache',
+        'TIMEOUT': int(os.environ.get('LOCAL_CACHE_TIMEOUT', '60')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('LOCAL_CACHE_MAX_ENTRIES', '1000'))},
+    },
+}
+
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', '300' if SHARED_CACHE else '0'))
+FACET_CACHE_TIMEOUT = int(os.environ.get('FACET_CACHE_TIMEOUT', '3600' if SHARED_CACHE else '0'))
+
+# Bundle written by `manage.py bundle_templates` and served by
+# gamingapp.template_loaders.BundleLoader; see gaming/settings_production.py.
+TEMPLATE_BUNDLE = BASE_DIR / 'templates.bundle.json'
+TEMPLATE_PRECOMPILE = False
+
 WSGI_APPLICATION = 'gaming.wsgi.application'
 
 
@@ -77,15 +117,75 @@ WSGI_APPLICATION = 'gaming.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'gaming',  
-        'USER': 'postgres',  
-        'PASSWORD': 'postgres',  
-        'HOST': 'localhost', 
-        'PORT': '5432', 
+        # django.db.backends.postgresql, timing connection acquisition for /metrics.
+        'ENGINE': 'gamingapp.db_backends.postgresql',
+        'NAME': os.environ.get('DATABASE_NAME', 'gaming'),
+        'USER': os.environ.get('DATABASE_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD', 'postgres'),
+        'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
+        'PORT': os.environ.get('DATABASE_PORT', '5432'),
+        # Keep connections open between requests and check them before reuse.
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DATABASE_CONN_HEALTH_CHECKS', '1') == '1',
+        'OPTIONS': {},
     }
 }
 
+# Read replicas, e.g. DATABASE_REPLICA_HOSTS=replica-1,replica-2. Reads are
+# routed to them by gamingapp.routers.ReplicaRouter; clients stay on the
+# primary for REPLICA_STICKINESS_SECONDS after a write.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['gamingapp.routers.ReplicaRouter']
+REPLICA_STICKINESS_SECONDS = 10
+
+
+# Sessions and authentication
+# SESSION_ENGINE_MODE is one of db, cached_db, cache or signed_cookies. The
+# cache modes need the shared cache (CACHE_URL): with a per-process cache a
+# worker would not see sessions created, changed or ended by the others, so
+# they are refused without it and cached_db is only the default with it.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE_MODE = os.environ.get('SESSION_ENGINE_MODE', 'cached_db' if SHARED_CACHE else 'db')
+if SESSION_ENGINE_MODE in ('cache', 'cached_db') and not SHARED_CACHE:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(f"SESSION_ENGINE_MODE={SESSION_ENGINE_MODE} requires CACHE_URL (a shared cache).")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_ENGINE_MODE]
+
+# With a shared cache request.user is loaded from it, see
+# gamingapp.auth_backends; a per-process copy could not be invalidated from
+# other workers. Sessions created by either backend keep working.
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+if SHARED_CACHE:
+    AUTHENTICATION_BACKENDS.insert(0, 'gamingapp.auth_backends.CachedModelBackend')
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', '30'))
+
+# PASSWORD_HASHER selects the hasher for new passwords (pbkdf2, scrypt, argon2
+# or bcrypt; the last two need argon2-cffi / bcrypt installed). The others stay
+# listed so existing hashes verify and are upgraded on login. See
+# benchmarks/bench_auth.py for the cost of each.
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'gamingapp.hashers.ConfigurablePBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', '0')) or None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -128,6 +228,35 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Per-view timings are exported at /metrics; Server-Timing headers are opt-in.
+METRICS_SERVER_TIMING = DEBUG
+
+# Lower-price listings are paginated by (price, id) keyset cursors.
+LOWER_PRICES_PAGE_SIZE = 50
+LOWER_PRICES_MAX_PAGE_SIZE = 500
+LOWER_PRICES_STREAM_CHUNK_SIZE = 500
+
+# Store product listings are filtered by facets and paginated by page number.
+LAPTOPS_PAGE_SIZE = 25
+LAPTOPS_MAX_PAGE_SIZE = 200
+
+# JSON API (api/v1/) list endpoints are paginated by id keyset cursors.
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+API_BATCH_MAX_IDS = 100
+
+# Catalog exports stream laptops from a server-side cursor in chunks of this size.
+EXPORT_CHUNK_SIZE = 2000
+
+# Handlers run on a background thread per process (gamingapp.log): requests
+# only render the message and enqueue it. The file is JSON lines, written in
+# batches and rotated by size and age. Each process writes its own file, since
+# one worker rotating a shared file would rename it under the others: `{pid}`
+# in LOG_FILE is replaced by the process id. LOG_INFO_SAMPLE_RATE keeps that
+# share of the per-request INFO records from the views.
+LOG_FILE = os.environ.get('LOG_FILE', 'django_app.{pid}.log')
+LOG_INFO_SAMPLE_RATE = float(os.environ.get('LOG_INFO_SAMPLE_RATE', '1'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -140,18 +269,37 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'gamingapp.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sampling': {
+            '()': 'gamingapp.log.SamplingFilter',
+            'rates': {'gamingapp.views': LOG_INFO_SAMPLE_RATE},
+        },
     },
     'handlers': {
         'console': {
             'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
+            'class': 'gamingapp.log.QueueingHandler',
+            'target': {'class': 'logging.StreamHandler'},
+            'filters': ['sampling'],
             'formatter': 'simple',
         },
         'file': {
             'level': 'WARNING',
-            'class': 'logging.FileHandler',
-            'filename': 'django_app.log',
-            'formatter': 'verbose',
+            'class': 'gamingapp.log.QueueingHandler',
+            'target': {
+                'class': 'gamingapp.log.BatchingRotatingFileHandler',
+                'filename': LOG_FILE,
+                'max_bytes': int(os.environ.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024)),
+                'rotate_interval': int(os.environ.get('LOG_FILE_ROTATE_SECONDS', 24 * 60 * 60)),
+                'backup_count': int(os.environ.get('LOG_FILE_BACKUP_COUNT', 7)),
+                'batch_size': 100,
+            },
+            'filters': ['sampling'],
+            'formatter': 'json',
         },
     },
     'loggers': {
@@ -160,10 +308,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
-        'blogserviceapp': {
+        'gamingapp': {
             'handlers': ['console', 'file'],
             'level': 'DEBUG',
             'propagate': False,
         },
     },
-}
\ No newline at end of file
+}
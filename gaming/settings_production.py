@@ -0,0 +1,35 @@
+"""
+Production settings for gaming project.
+
+Select with DJANGO_SETTINGS_MODULE=gaming.settings_production. Templates are
+served from the bundle written by `manage.py bundle_templates` (falling back to
+the template directories for anything not bundled), compiled once per process
+at startup and kept by the cached loader.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATE_BUNDLE, TEMPLATES
+
+DEBUG = False
+
+METRICS_SERVER_TIMING = False
+
+TEMPLATE_PRECOMPILE = True
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'debug': False,
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    ('gamingapp.template_loaders.BundleLoader', str(TEMPLATE_BUNDLE)),
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
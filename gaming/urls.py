@@ -14,7 +14,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.urls import path
+from django.urls import include, path
 from django.contrib import admin
 from gamingapp import views
 
@@ -27,6 +27,9 @@ urlpatterns = [
     path('delete-account/', views.DeleteAccountView.as_view(), name='delete_account'),
     path('stores/<int:store_pk>/products/add', views.AddLaptopView.as_view(), name='product-list-add'),
     path('stores/<int:store_pk>/products/', views.search_laptops, name='product-list'),
+    path('stores/<int:store_pk>/products/import', views.ImportLaptopsView.as_view(), name='product-import'),
+    path('stores/<int:store_pk>/products/export', views.export_laptops, name='product-export'),
+    path('stores/<int:store_pk>/products/facets/', views.laptop_facets, name='product-facets'),
     path('stores/<int:store_pk>/products/<int:product_pk>/update/', views.UpdateLaptopView.as_view(), name='product-update'),    
     path('stores/<int:store_pk>/products/<int:product_pk>/delete/', views.DeleteLaptopView.as_view(), name='product-delete'),
     path('stores/', views.StoreListView.as_view(), name='store-list'),
@@ -40,4 +43,11 @@ urlpatterns = [
     path('search/', views.search_stores, name='search-products'),
     path('products/<int:product_pk>/<int:user_pk>', views.review_view, name='review'),
     path('products/<int:product_pk>/', views.review_request_user_view, name='user-review'),
+    path('async/stores/<int:store_pk>/products/', views.search_laptops_async, name='product-list-async'),
+    path('async/search/', views.search_stores_async, name='search-products-async'),
+    path('async/products/<int:product_pk>/<int:user_pk>', views.review_view_async, name='review-async'),
+    path('api/v1/', include('gamingapp.api_urls')),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('healthz/live', views.liveness, name='liveness'),
+    path('healthz/ready', views.readiness, name='readiness'),
 ]
\ No newline at end of file
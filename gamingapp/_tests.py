@@ -1,7 +1,35 @@
+import gzip
+import io
+import json
+import logging
+import os
+import random
+from datetime import timedelta
+from decimal import Decimal
+
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Avg
+from django.http import HttpResponse, QueryDict
+from django.template import Engine
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
-from .models import Store, Laptop, Review
+from . import db_pool, metrics, review_stats, views
+from .models import BetterDeal, Store, Laptop, Review
+from .deals import dominated_queryset
+from .dominance import dominance_index, dominating_queryset
+from .cache_backends import LocalLRUCache
+from .log import BatchingRotatingFileHandler, JsonFormatter, QueueingHandler, SamplingFilter
+from .middleware import ReplicaRoutingMiddleware
+from .routers import ReplicaRouter
+from .search import InvertedIndex
+from .template_registry import check_view_templates, template_registry, view_template_names
+from django.utils.html import escape
 from django.utils.timezone import now
 
 @pytest.fixture
@@ -124,4 +152,1088 @@ def test_laptop_creation():
     assert laptop.graphics_card == 2
     assert laptop.ram == 16
     assert laptop.storage == 512  # Fixed field name
-    assert laptop.url == 'http://example.com/laptop'
\ No newline at end of file
+    assert laptop.url == 'http://example.com/laptop'
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for alias in caches:
+        caches[alias].clear()
+    yield
+    for alias in caches:
+        caches[alias].clear()
+
+
+def make_laptop(store, name, price, screen_size=15.6, processor=4, graphics_card=2, ram=16, storage=512):
+    laptop = Laptop.objects.create(
+        name=name,
+        screen_size=screen_size,
+        price=price,
+        processor=processor,
+        graphics_card=graphics_card,
+        ram=ram,
+        storage=storage,
+        url=f'https://example.com/{name}',
+    )
+    laptop.owner.add(store)
+    return laptop
+
+
+@pytest.fixture
+def catalog(user):
+    store = Store.objects.create(title='Catalog Store', user=user)
+    rng = random.Random(1234)
+    laptops = [
+        make_laptop(
+            store,
+            f'laptop-{i}',
+            Decimal(rng.randrange(300, 3000)),
+            screen_size=rng.choice([13.3, 14.0, 15.6, 17.3]),
+            processor=rng.randrange(1, 10),
+            graphics_card=rng.randrange(1, 6),
+            ram=rng.choice([8, 16, 32, 64]),
+            storage=rng.choice([256, 512, 1024, 2048]),
+        )
+        for i in range(200)
+    ]
+    return store, laptops
+
+
+@pytest.mark.django_db
+def test_dominance_index_matches_database(catalog):
+    store, laptops = catalog
+    for laptop in laptops[:50]:
+        expected = list(dominating_queryset(laptop).values_list('pk', flat=True))
+        assert dominance_index.dominating(laptop) == expected
+        dominated = set(dominated_queryset(laptop).values_list('pk', flat=True))
+        assert set(dominance_index.iter_dominated(laptop)) == dominated
+
+
+@pytest.mark.django_db
+def test_dominance_index_follows_writes(catalog):
+    store, laptops = catalog
+    target = max(laptops, key=lambda laptop: laptop.price)
+    better = make_laptop(store, 'better', Decimal('1'), screen_size=20, processor=99,
+                         graphics_card=99, ram=128, storage=4096)
+    assert dominance_index.dominating(target, limit=1) == [better.pk]
+
+    better.price = target.price + 1
+    better.save()
+    assert better.pk not in dominance_index.dominating(target)
+
+    better.delete()
+    assert dominance_index.dominating(target) == list(
+        dominating_queryset(target).values_list('pk', flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_lower_price_views(logged_in_client, catalog):
+    store, laptops = catalog
+    target = max(laptops, key=lambda laptop: laptop.price)
+    expected = list(dominating_queryset(target))
+
+    response = logged_in_client.get(reverse('lower-prices', kwargs={'store_pk': store.pk, 'product_pk': target.pk}))
+    assert response.status_code == 200
+    assert response.context['component'] == expected[0]
+
+    response = logged_in_client.get(reverse('lower-prices-other', kwargs={'store_pk': store.pk, 'product_pk': target.pk}))
+    assert response.status_code == 200
+    assert list(response.context['components']) == expected[1:]
+
+
+def expected_deals(laptops):
+    return {
+        (laptop.pk, pk)
+        for laptop in laptops
+        for pk in dominating_queryset(laptop).values_list('pk', flat=True)
+    }
+
+
+@pytest.mark.django_db
+def test_better_deals_maintained_incrementally(catalog):
+    store, laptops = catalog
+    pairs = set(BetterDeal.objects.values_list('laptop_id', 'alternative_id'))
+    assert pairs == expected_deals(laptops)
+
+    laptops[0].price = Decimal('10')
+    laptops[0].ram = 64
+    laptops[0].save()
+    laptops[1].delete()
+    laptops = list(Laptop.objects.all())
+    pairs = set(BetterDeal.objects.values_list('laptop_id', 'alternative_id'))
+    assert pairs == expected_deals(laptops)
+
+
+@pytest.mark.django_db
+def test_rebuild_better_deals_command(catalog):
+    store, laptops = catalog
+    BetterDeal.objects.all().delete()
+    call_command('rebuild_better_deals', batch_size=50, stdout=io.StringIO())
+    pairs = set(BetterDeal.objects.values_list('laptop_id', 'alternative_id'))
+    assert pairs == expected_deals(laptops)
+
+
+@pytest.mark.django_db
+def test_lower_prices_keyset_pagination(logged_in_client, catalog):
+    store, laptops = catalog
+    target = max(laptops, key=lambda laptop: laptop.price)
+    expected = list(dominating_queryset(target))[1:]
+    url = reverse('lower-prices-other', kwargs={'store_pk': store.pk, 'product_pk': target.pk})
+
+    # Follow the Next links, which keep page_size.
+    seen = []
+    querystring = 'page_size=7'
+    while querystring:
+        response = logged_in_client.get(f'{url}?{querystring}')
+        assert response.status_code == 200
+        assert len(response.context['components']) <= 7
+        seen.extend(response.context['components'])
+        querystring = response.context['next_querystring']
+        if querystring:
+            assert f'href="?{escape(querystring)}"' in response.content.decode()
+            assert QueryDict(querystring)['page_size'] == '7'
+    assert seen == expected
+
+    response = logged_in_client.get(url, {'after': 'not-a-cursor'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_lower_prices_streaming(logged_in_client, catalog, settings):
+    store, laptops = catalog
+    target = max(laptops, key=lambda laptop: laptop.price)
+    expected = list(dominating_queryset(target))[1:]
+    url = reverse('lower-prices-other', kwargs={'store_pk': store.pk, 'product_pk': target.pk})
+
+    settings.LOWER_PRICES_STREAM_CHUNK_SIZE = 4
+    response = logged_in_client.get(url, {'stream': 1})
+    assert response.streaming
+    chunks = [chunk.decode() for chunk in response.streaming_content]
+    content = ''.join(chunks)
+    assert len(chunks) > 3
+    assert chunks[0].startswith('<!DOCTYPE html>') and '<h2>Records with Lower Prices</h2>' in chunks[0]
+    assert content.rstrip().endswith('</html>') and '<!-- rows' not in content
+    assert content.count('<p>') == len(expected)
+    assert all(f'<p>{laptop.name}</p>' in content for laptop in expected)
+
+
+def test_inverted_index_prefix_and_ranking():
+    index = InvertedIndex([
+        (1, [('Gaming Hub', 1.0), ('laptops and more', 0.4)]),
+        (2, [('Office Supplies', 1.0), ('gaming chairs', 0.4)]),
+        (3, [('Garden Centre', 1.0), (None, 0.4)]),
+    ])
+    assert index.search(['gam']) == [(1, 1.0), (2, 0.4)]
+    assert index.search(['ga']) == [(1, 1.0), (3, 1.0), (2, 0.4)]
+    assert index.search(['gam', 'chair']) == [(2, 0.8)]
+    assert index.search(['missing']) == []
+
+
+@pytest.mark.django_db
+def test_search_stores_view(client, user):
+    hub = Store.objects.create(title='Gaming Hub', description='laptops', user=user)
+    office = Store.objects.create(title='Office', description='gaming chairs', user=user)
+    Store.objects.create(title='Garden', user=user)
+
+    response = client.get(reverse('search-products'), {'q': 'gam'})
+    assert response.status_code == 200
+    assert list(response.context['products']) == [hub, office]
+
+    office.title = 'Gamer Office'
+    office.save()
+    response = client.get(reverse('search-products'), {'q': 'gam'})
+    assert set(response.context['products']) == {hub, office}
+
+
+@pytest.mark.django_db
+def test_search_laptops_within_store(client, user):
+    store = Store.objects.create(title='Store', user=user)
+    other = Store.objects.create(title='Other', user=user)
+    thinkpad = make_laptop(store, 'ThinkPad X1', Decimal('1000'))
+    make_laptop(store, 'MacBook Air', Decimal('1200'))
+    make_laptop(other, 'ThinkPad T14', Decimal('900'))
+
+    response = client.get(reverse('product-list', kwargs={'store_pk': store.pk}), {'q': 'think'})
+    assert response.status_code == 200
+    assert list(response.context['products']) == [thinkpad]
+
+
+@pytest.mark.django_db
+def test_facet_links_toggle_one_bucket(client, catalog):
+    store, laptops = catalog
+    url = reverse('product-list', kwargs={'store_pk': store.pk})
+    response = client.get(url, {'q': 'laptop', 'ram': '16-32', 'price': '-500', 'sort': 'popular', 'page_size': 10})
+    links = {
+        (field, bucket['key']): QueryDict(bucket['querystring'])
+        for field, buckets in response.context['facets'].items()
+        for bucket in buckets
+    }
+
+    selected = links[('ram', '16-32')]
+    assert selected.getlist('ram') == [] and selected.getlist('price') == ['-500']
+    added = links[('ram', '32-64')]
+    assert added.getlist('ram') == ['16-32', '32-64'] and added.getlist('price') == ['-500']
+    assert all(
+        (params['q'], params['sort'], params['page_size']) == ('laptop', 'popular', '10') and 'page' not in params
+        for params in links.values()
+    )
+    assert f'href="?{escape(response.context["facets"]["ram"][0]["querystring"])}"' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_laptop_facets(client, catalog, django_assert_num_queries, settings):
+    settings.FACET_CACHE_TIMEOUT = 3600
+    store, laptops = catalog
+    url = reverse('product-facets', kwargs={'store_pk': store.pk})
+
+    response = client.get(url, {'ram': '16-32', 'price': ['-500', '500-1000'], 'page_size': 500})
+    data = response.json()
+    expected = [
+        laptop for laptop in laptops
+        if 16 <= laptop.ram < 32 and laptop.price < 1000
+    ]
+    assert data['total'] == len(expected)
+    assert {row['id'] for row in data['products']} == {laptop.pk for laptop in expected}
+
+    ram_counts = {bucket['key']: bucket['count'] for bucket in data['facets']['ram']}
+    assert ram_counts['32-64'] == sum(1 for laptop in laptops if 32 <= laptop.ram < 64 and laptop.price < 1000)
+    price_counts = {bucket['key']: bucket['count'] for bucket in data['facets']['price']}
+    assert price_counts['2000-'] == sum(1 for laptop in laptops if 16 <= laptop.ram < 32 and laptop.price >= 2000)
+
+    # Cached counts: only the page itself is queried.
+    with django_assert_num_queries(1):
+        client.get(url, {'ram': '16-32', 'price': ['-500', '500-1000'], 'page_size': 500})
+
+
+@pytest.mark.django_db
+def test_laptop_facets_invalidated_on_change(client, catalog, settings):
+    settings.FACET_CACHE_TIMEOUT = 3600
+    store, laptops = catalog
+    url = reverse('product-facets', kwargs={'store_pk': store.pk})
+    total = client.get(url).json()['total']
+
+    make_laptop(store, 'extra', Decimal('100'))
+    assert client.get(url).json()['total'] == total + 1
+
+    laptops[0].owner.remove(store)
+    laptops[1].delete()
+    assert client.get(url).json()['total'] == total - 1
+
+
+def count_queries(client, url, params=None):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params or {})
+    assert response.status_code == 200
+    if hasattr(response, 'render'):
+        response.render()
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_list_view_queries_do_not_grow_with_results(logged_in_client, user, settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    owner = User.objects.create_user(username='owner', password='ownerpass')
+    store = Store.objects.create(title='Store 0', user=user)
+    laptop = make_laptop(store, 'laptop-0', Decimal('1000'))
+    Review.objects.create(user=user, laptop=laptop, comment='first')
+
+    urls = [
+        (reverse('store-list'), None),
+        (reverse('store-detail', kwargs={'pk': store.pk}), None),
+        (reverse('search-products'), None),
+        (reverse('search-products'), {'q': 'store'}),
+        (reverse('category'), None),
+        (reverse('product-list', kwargs={'store_pk': store.pk}), None),
+        (reverse('product-list', kwargs={'store_pk': store.pk}), {'q': 'laptop'}),
+        (reverse('review', kwargs={'product_pk': laptop.pk, 'user_pk': user.pk}), None),
+    ]
+    logged_in_client.get(reverse('category'))  # warm the cached request.user
+    before = [count_queries(logged_in_client, url, params) for url, params in urls]
+
+    for i in range(1, 10):
+        Store.objects.create(title=f'Store {i}', user=user if i % 2 else owner)
+        make_laptop(store, f'laptop-{i}', Decimal(1000 + i))
+
+    after = [count_queries(logged_in_client, url, params) for url, params in urls]
+    assert after == before
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client, user, settings):
+    settings.METRICS_SERVER_TIMING = True
+    settings.FACET_CACHE_TIMEOUT = 3600
+    metrics.registry.reset()
+    store = Store.objects.create(title='Store', user=user)
+    make_laptop(store, 'laptop', Decimal('1000'))
+
+    response = client.get(reverse('store-list'))
+    assert 'db;dur=' in response['Server-Timing']
+    client.get(reverse('product-facets', kwargs={'store_pk': store.pk}))
+    client.get(reverse('product-facets', kwargs={'store_pk': store.pk}))
+
+    snapshot = metrics.registry.snapshot()
+    assert snapshot['store-list'][metrics.COUNT] == 1
+    assert snapshot['store-list'][metrics.QUERIES] >= 1
+    assert snapshot['store-list'][metrics.TEMPLATE_TIME] > 0
+    assert snapshot['product-facets'][metrics.CACHE_MISSES] == 1
+    assert snapshot['product-facets'][metrics.CACHE_HITS] == 1
+
+    body = client.get(reverse('metrics')).content.decode()
+    assert 'gaming_requests_total{view="store-list"} 1' in body
+    assert '# TYPE gaming_db_queries_total counter' in body
+
+
+def test_template_registry_lookup():
+    assert template_registry.exists('store_list.html')
+    assert not template_registry.exists('missing.html')
+    assert 'signup.html' in view_template_names()
+    assert 'search_laptops.html' in view_template_names()
+
+
+def test_view_templates_check(monkeypatch):
+    assert check_view_templates() == []
+    monkeypatch.setattr(views, 'FUNCTION_VIEW_TEMPLATES', ('missing.html',))
+    assert [error.id for error in check_view_templates()] == ['gamingapp.E001']
+
+
+def test_bundle_templates_command(tmp_path):
+    bundle_path = tmp_path / 'bundle.json'
+    call_command('bundle_templates', output=str(bundle_path), stdout=io.StringIO())
+    bundle = json.loads(bundle_path.read_text())
+    assert set(bundle) == set(template_registry.names)
+
+    engine = Engine(loaders=[('gamingapp.template_loaders.BundleLoader', str(bundle_path))])
+    assert engine.get_template('store_list.html').source == bundle['store_list.html']
+
+
+@pytest.mark.django_db
+def test_health_endpoints(client):
+    assert client.get(reverse('liveness')).content == b'ok'
+    response = client.get(reverse('readiness'))
+    assert response.status_code == 200
+
+
+@async_to_sync
+async def async_get(url, params=None):
+    return await AsyncClient().get(url, params or {})
+
+
+@pytest.mark.django_db
+def test_async_catalog_views_match_sync(client, catalog):
+    store, laptops = catalog
+    Review.objects.create(user=store.user, laptop=laptops[0], comment='great')
+
+    pairs = [
+        (reverse('product-list', kwargs={'store_pk': store.pk}),
+         reverse('product-list-async', kwargs={'store_pk': store.pk}), {'ram': '16-32', 'q': 'laptop'}),
+        (reverse('search-products'), reverse('search-products-async'), {'q': 'catalog'}),
+        (reverse('review', kwargs={'product_pk': laptops[0].pk, 'user_pk': store.user.pk}),
+         reverse('review-async', kwargs={'product_pk': laptops[0].pk, 'user_pk': store.user.pk}), {}),
+    ]
+    for sync_url, async_url, params in pairs:
+        expected = client.get(sync_url, params)
+        response = async_get(async_url, params)
+        assert response.status_code == 200
+        assert response.content == expected.content
+
+    response = async_get(reverse('review-async', kwargs={'product_pk': 0, 'user_pk': 0}))
+    assert response.status_code == 404
+
+
+def test_replica_router_read_your_writes(settings, rf):
+    settings.DATABASE_REPLICAS = ['replica_1']
+    router = ReplicaRouter()
+    assert router.db_for_read(Laptop) == 'replica_1'
+    assert router.db_for_write(Laptop) == 'default'
+    assert not router.allow_migrate('replica_1', 'gamingapp')
+
+    seen = []
+    middleware = ReplicaRoutingMiddleware(lambda request: seen.append(router.db_for_read(Laptop)) or HttpResponse())
+
+    response = middleware(rf.post('/stores/add'))
+    assert seen[-1] == 'default'
+    cookie = response.cookies[ReplicaRoutingMiddleware.COOKIE_NAME]
+    assert cookie['max-age'] == settings.REPLICA_STICKINESS_SECONDS
+
+    request = rf.get('/stores/')
+    request.COOKIES[ReplicaRoutingMiddleware.COOKIE_NAME] = cookie.value
+    middleware(request)
+    assert seen[-1] == 'default'
+
+    middleware(rf.get('/stores/'))
+    assert seen[-1] == 'replica_1'
+    assert router.db_for_read(Laptop) == 'replica_1'
+
+    # Every read of one request goes to the same replica.
+    settings.DATABASE_REPLICAS = [f'replica_{i}' for i in range(1, 9)]
+    middleware = ReplicaRoutingMiddleware(
+        lambda request: [seen.append(router.db_for_read(Laptop)) for _ in range(10)] and HttpResponse(),
+    )
+    for _ in range(5):
+        seen.clear()
+        middleware(rf.get('/stores/'))
+        assert len(set(seen)) == 1
+
+
+@pytest.mark.django_db
+def test_connection_metrics_exported(client):
+    body = client.get(reverse('metrics')).content.decode()
+    assert 'gaming_db_connections_opened_total{alias="default"}' in body
+    assert '# TYPE gaming_db_connections_in_use gauge' in body
+    assert 'gaming_db_connections_idle{alias="default"}' in body
+
+
+@pytest.mark.django_db
+def test_connection_acquisition_is_timed(client):
+    from django.db.backends.sqlite3.base import DatabaseWrapper
+
+    class TimedWrapper(db_pool.ConnectionTimingMixin, DatabaseWrapper):
+        pass
+
+    wrapper = TimedWrapper({
+        **connection.settings_dict, 'NAME': ':memory:', 'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True,
+    }, alias='timed')
+    try:
+        wrapper.cursor().execute('SELECT 1')
+        wrapper.cursor().execute('SELECT 1')
+        assert db_pool._acquisitions['timed'][0] == 1
+
+        # A new request health-checks the persistent connection once.
+        wrapper.close_if_unusable_or_obsolete()
+        wrapper.cursor().execute('SELECT 1')
+        wrapper.cursor().execute('SELECT 1')
+        acquisitions, seconds, failures = db_pool._acquisitions['timed']
+        assert (acquisitions, failures) == (2, 0) and seconds > 0
+    finally:
+        wrapper.close()
+        db_pool._acquisitions.pop('timed', None)
+
+    body = client.get(reverse('metrics')).content.decode()
+    assert '# TYPE gaming_db_connection_wait_seconds_total counter' in body
+    assert 'gaming_db_connection_acquisitions_total{alias="default"}' in body
+
+
+def test_local_lru_cache_eviction_and_ttl():
+    local = LocalLRUCache('test', {'TIMEOUT': 60, 'OPTIONS': {'MAX_ENTRIES': 2}})
+    local.set('a', 1)
+    local.set('b', 2)
+    assert local.get('a') == 1
+    local.set('c', 3)
+    assert local.get('b') is None
+    assert local.get('a') == 1 and local.get('c') == 3
+    local.set('d', 4, timeout=-1)
+    assert local.get('d') is None
+    assert local.incr('c') == 4
+
+
+@pytest.mark.django_db
+def test_response_cache_serves_hits_and_invalidates(client, user, settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 300
+    store = Store.objects.create(title='Cached Store', user=user)
+    laptop = make_laptop(store, 'cached-laptop', Decimal('1000'))
+    product_list = reverse('product-list', kwargs={'store_pk': store.pk})
+    detail = reverse('store-detail', kwargs={'pk': store.pk})
+
+    first = client.get(reverse('store-list'))
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get(reverse('store-list'))
+    assert second.content == first.content
+    assert len(queries) == 0
+
+    laptop.name = 'renamed-laptop'
+    laptop.save()
+    assert b'renamed-laptop' in client.get(product_list).content
+    make_laptop(store, 'new-laptop', Decimal('900'))
+    assert b'new-laptop' in client.get(product_list).content
+
+    assert b'Cached Store' in client.get(detail).content
+    store.title = 'Renamed Store'
+    store.save()
+    assert b'Renamed Store' in client.get(detail).content
+    assert b'Renamed Store' in client.get(reverse('store-list')).content
+
+    user.username = 'renamed-user'
+    user.save()
+    assert b'renamed-user' in client.get(detail).content
+
+    review_url = reverse('review', kwargs={'product_pk': laptop.pk, 'user_pk': user.pk})
+    assert b'Review by' not in client.get(review_url).content
+    Review.objects.create(user=user, laptop=laptop, comment='cached review')
+    assert b'Review by renamed-user' in client.get(review_url).content
+
+
+@pytest.mark.django_db
+def test_conditional_get_returns_not_modified(logged_in_client, user, settings):
+    settings.SHARED_CACHE = True
+    store = Store.objects.create(title='Polled Store', user=user)
+    laptop = make_laptop(store, 'polled', Decimal('2000'))
+    cheaper = make_laptop(store, 'cheaper', Decimal('1000'))
+    urls = [
+        (logged_in_client, reverse('product-list', kwargs={'store_pk': store.pk})),
+        (logged_in_client, reverse('store-detail', kwargs={'pk': store.pk})),
+        (logged_in_client, reverse('lower-prices', kwargs={'store_pk': store.pk, 'product_pk': laptop.pk})),
+        (logged_in_client, reverse('lower-prices-other', kwargs={'store_pk': store.pk, 'product_pk': laptop.pk})),
+    ]
+    etags = {}
+    for http, url in urls:
+        response = http.get(url)
+        assert response.status_code == 200
+        etags[url] = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = http.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == 304
+        assert not response.content
+        # Catalog pages use version stamps, the store page one small query.
+        assert len([q for q in queries if 'gamingapp_' in q['sql']]) == (url == urls[1][1])
+
+    cheaper.delete()
+    store.title = 'Renamed'
+    store.save()
+    for http, url in urls:
+        assert http.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code == 200
+
+    # Swapping linked laptops keeps their count and id sum but not the tag.
+    first, second, third = (make_laptop(store, f'swap-{i}', Decimal(1500 + i)) for i in range(3))
+    fourth = make_laptop(Store.objects.create(title='Elsewhere', user=user), 'swap-3', Decimal('1503'))
+    first.owner.remove(store)
+    listing = urls[0][1]
+    etag = logged_in_client.get(listing)['ETag']
+    second.owner.remove(store)
+    third.owner.remove(store)
+    first.owner.add(store)
+    fourth.owner.add(store)
+    assert logged_in_client.get(listing, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    settings.SHARED_CACHE = False
+    assert not logged_in_client.get(listing).has_header('ETag')
+
+    anonymous = Client().get(urls[2][1], HTTP_IF_NONE_MATCH=etags[urls[2][1]])
+    assert anonymous.status_code == 302
+
+
+IMPORT_CSV = (
+    "name,screen_size,price,processor,graphics_card,ram,storage,url\n"
+    "import-a,15.6,900,4,2,16,512,https://example.com/import-a\n"
+    "import-b,14,not-a-price,4,2,16,512,https://example.com/import-b\n"
+    "existing,15.6,500,8,4,32,1024,https://example.com/existing\n"
+    "import-c,13.3,1500,2,1,8,256,https://example.com/import-c\n"
+)
+
+
+@pytest.mark.django_db
+def test_import_laptops_command(tmp_path, user):
+    from .catalog import get_version
+
+    store = Store.objects.create(title='Import Store', user=user)
+    existing = make_laptop(store, 'existing', Decimal('2000'))
+    other = Store.objects.create(title='Also Lists It', user=user)
+    existing.owner.add(other)
+    make_laptop(other, 'bystander', Decimal('1200'), ram=8)
+    other_version = get_version('store-laptops', other.pk)
+    path = tmp_path / 'laptops.csv'
+    path.write_text(IMPORT_CSV)
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    call_command('import_laptops', str(path), store=store.pk, batch_size=2, stdout=stdout, stderr=stderr)
+    assert '3 of 4 rows (2 created, 1 updated, 1 errors)' in stdout.getvalue()
+    assert 'Line 3' in stderr.getvalue() and 'price' in stderr.getvalue()
+
+    existing.refresh_from_db()
+    assert existing.price == Decimal('500') and existing.ram == 32
+    assert store.laptop_set.count() == 3
+    # The other store listing the updated laptop sees the change too.
+    assert get_version('store-laptops', other.pk) != other_version
+    # import-a is dominated by the updated laptop; its deals were refreshed.
+    import_a = Laptop.objects.get(name='import-a')
+    assert list(BetterDeal.objects.filter(laptop=import_a).values_list('alternative_id', flat=True)) == [existing.pk]
+    assert set(BetterDeal.objects.values_list('laptop_id', 'alternative_id')) == expected_deals(Laptop.objects.all())
+
+
+@pytest.mark.django_db
+def test_import_laptops_leaves_other_stores_alone(user):
+    from .imports import import_laptops
+
+    store_a = Store.objects.create(title='Store A', user=user)
+    stranger = User.objects.create_user(username='stranger', password='strangerpass')
+    store_b = Store.objects.create(title='Store B', user=stranger)
+    listed = make_laptop(store_a, 'existing', Decimal('2000'))
+
+    rows = [(1, {'name': 'imposter', 'screen_size': 15.6, 'price': '1', 'processor': 1, 'graphics_card': 1,
+                 'ram': 4, 'storage': 128, 'url': listed.url})]
+    report = import_laptops(store_b, rows)
+    assert (report.created, report.updated) == (1, 0)
+
+    listed.refresh_from_db()
+    assert (listed.name, listed.price) == ('existing', Decimal('2000'))
+    assert list(listed.owner.all()) == [store_a]
+    assert store_b.laptop_set.get().name == 'imposter'
+
+
+@pytest.mark.django_db
+def test_import_laptops_upload(logged_in_client, user):
+    store = Store.objects.create(title='Upload Store', user=user)
+    url = reverse('product-import', kwargs={'store_pk': store.pk})
+    lines = [
+        json.dumps({'name': f'upload-{i}', 'screen_size': 15, 'price': 1000 + i, 'processor': 4,
+                    'graphics_card': 2, 'ram': 16, 'storage': 512, 'url': f'https://example.com/upload-{i}'})
+        for i in range(5)
+    ] + ['not json', '{"name": "missing fields"}']
+    upload = io.BytesIO('\n'.join(lines).encode())
+    upload.name = 'laptops.jsonl'
+
+    response = logged_in_client.post(url, {'file': upload})
+    report = response.json()
+    assert response.status_code == 200
+    assert (report['rows'], report['created'], report['error_count']) == (7, 5, 2)
+    assert [error['line'] for error in report['errors']] == [6, 7]
+    assert store.laptop_set.count() == 5
+    assert logged_in_client.get(reverse('product-facets', kwargs={'store_pk': store.pk})).json()['total'] == 5
+
+    stranger = User.objects.create_user(username='stranger', password='strangerpass')
+    foreign = Store.objects.create(title='Foreign', user=stranger)
+    assert logged_in_client.post(reverse('product-import', kwargs={'store_pk': foreign.pk}), {}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_export_laptops_streams_csv_jsonl_and_gzip(client, user, settings, tmp_path):
+    settings.EXPORT_CHUNK_SIZE = 2
+    store = Store.objects.create(title='Export Store', user=user)
+    laptops = [make_laptop(store, f'export-{i}', Decimal(1000 + i)) for i in range(5)]
+    Review.objects.create(user=user, laptop=laptops[0], comment='great, really')
+    url = reverse('product-export', kwargs={'store_pk': store.pk})
+
+    response = client.get(url)
+    assert response.streaming
+    content = b''.join(response.streaming_content).decode()
+    lines = content.splitlines()
+    assert lines[0] == 'id,name,screen_size,price,processor,graphics_card,ram,storage,url,created_at,updated_at'
+    assert len(lines) == 6
+
+    # Reviews are prefetched per chunk: laptops and reviews for each of 3 chunks.
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, {'format': 'jsonl', 'reviews': '1'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+    assert len(queries) <= 1 + 2 * 3
+    assert [row['name'] for row in rows] == [f'export-{i}' for i in range(5)]
+    assert rows[0]['reviews'] == [{'id': laptops[0].reviews.get().pk, 'user': 'testuser', 'comment': 'great, really'}]
+
+    response = client.get(url, {'reviews': '1', 'gzip': '1'})
+    assert response['Content-Type'] == 'application/gzip'
+    exported = gzip.decompress(b''.join(response.streaming_content)).decode()
+    assert exported.splitlines()[0].endswith('review_id,review_user,review_comment')
+
+    # The CSV export round-trips through the importer.
+    other = Store.objects.create(title='Copy', user=user)
+    path = tmp_path / 'export.csv'
+    path.write_text(content)
+    call_command('import_laptops', str(path), store=other.pk, stdout=io.StringIO())
+    assert other.laptop_set.count() == 5
+
+    assert client.get(url, {'format': 'xml'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_lists_with_fields_cursor_and_includes(client, user, django_assert_num_queries):
+    owner = User.objects.create_user(username='owner', password='ownerpass')
+    store = Store.objects.create(title='API Store', user=user)
+    other = Store.objects.create(title='Other API Store', user=owner)
+    laptops = [make_laptop(store, f'api-{i}', Decimal(1000 + i)) for i in range(5)]
+    laptops[0].owner.add(other)
+    Review.objects.create(user=user, laptop=laptops[0], comment='solid')
+    Review.objects.create(user=owner, laptop=laptops[0], comment='meh')
+
+    url = reverse('api-laptop-list')
+    params = {'store': store.pk, 'fields': 'name,price', 'include': 'stores,reviews', 'page_size': 3}
+    # Page, store links and reviews: one query each regardless of page size.
+    with django_assert_num_queries(3):
+        first = client.get(url, params).json()
+    assert [row['name'] for row in first['data']] == ['api-0', 'api-1', 'api-2']
+    assert set(first['data'][0]) == {'id', 'name', 'price', 'stores', 'reviews'}
+    assert first['data'][0]['price'] == '1000.00'
+    assert first['data'][0]['stores'] == [store.pk, other.pk]
+    assert [review['comment'] for review in first['data'][0]['reviews']] == ['solid', 'meh']
+
+    second = client.get(url, {**params, 'after': first['next_cursor']}).json()
+    assert [row['name'] for row in second['data']] == ['api-3', 'api-4']
+    assert second['next_cursor'] is None
+
+    stores = client.get(reverse('api-store-list'), {'fields': 'title', 'include': 'user'}).json()['data']
+    assert stores == [
+        {'id': store.pk, 'title': 'API Store', 'user': {'id': user.pk, 'username': 'testuser'}},
+        {'id': other.pk, 'title': 'Other API Store', 'user': {'id': owner.pk, 'username': 'owner'}},
+    ]
+    review = client.get(reverse('api-review-list'), {'user': owner.pk, 'include': 'laptop'}).json()['data'][0]
+    assert review['laptop']['name'] == 'api-0' and review['user'] == owner.pk
+
+    detail = client.get(reverse('api-laptop-detail', kwargs={'pk': laptops[1].pk}), {'fields': 'url'})
+    assert detail.json() == {'data': {'id': laptops[1].pk, 'url': 'https://example.com/api-1'}}
+    assert client.get(reverse('api-laptop-detail', kwargs={'pk': 0})).status_code == 404
+    assert client.get(url, {'fields': 'password'}).status_code == 400
+    assert client.get(url, {'after': 'x'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_laptop_batch_and_compare(client, user, django_assert_num_queries):
+    owner = User.objects.create_user(username='owner', password='ownerpass')
+    store = Store.objects.create(title='Batch Store', user=user)
+    other = Store.objects.create(title='Other Batch Store', user=owner)
+    cheap = make_laptop(store, 'cheap', Decimal('800'), ram=32)
+    dear = make_laptop(store, 'dear', Decimal('1200'), ram=16)
+    odd = make_laptop(other, 'odd', Decimal('500'), screen_size=13.3, ram=8)
+    Review.objects.create(user=user, laptop=cheap, comment='nice', rating=5)
+    last = Review.objects.create(user=owner, laptop=cheap, comment='ok', rating=2)
+    ids = f'{dear.pk},{cheap.pk},{odd.pk},0'
+
+    with django_assert_num_queries(2):
+        data = client.get(reverse('api-laptop-batch'), {'ids': ids}).json()
+    assert [row['name'] for row in data['data']] == ['dear', 'cheap', 'odd']
+    assert data['missing'] == [0]
+    assert data['data'][1]['stores'] == [{'id': store.pk, 'title': 'Batch Store'}]
+    last.refresh_from_db()
+    assert data['data'][1]['reviews'] == {
+        'count': 2, 'last_reviewed_at': last.created_at.isoformat().replace('+00:00', 'Z'), 'average_rating': 3.5,
+    }
+    assert data['data'][0]['reviews'] == {'count': 0, 'last_reviewed_at': None, 'average_rating': None}
+
+    with django_assert_num_queries(1):
+        matrix = client.get(reverse('api-laptop-compare'), {'ids': ids}).json()
+    assert matrix['ids'] == [dear.pk, cheap.pk, odd.pk]
+    assert matrix['differences']['price'][0] == ['0.00', '400.00', '700.00']
+    assert matrix['differences']['ram'][1][2] == 24
+    assert matrix['differences']['screen_size'][0] == [0.0, 0.0, 2.3]
+    assert matrix['dominates'] == [
+        [False, False, False],
+        [True, False, False],
+        [False, False, False],
+    ]
+
+    assert client.get(reverse('api-laptop-batch'), {'ids': 'a,b'}).status_code == 400
+    assert client.get(reverse('api-laptop-compare')).status_code == 400
+
+
+@pytest.mark.django_db
+def test_review_aggregates_follow_reviews(client, user):
+    store = Store.objects.create(title='Review Store', user=user)
+    popular = make_laptop(store, 'popular', Decimal('1000'))
+    quiet = make_laptop(store, 'quiet', Decimal('900'))
+    stale = Laptop.objects.get(pk=popular.pk)
+    users = [user] + [User.objects.create_user(username=f'reviewer-{i}', password='pass') for i in range(2)]
+    reviews = [
+        Review.objects.create(user=reviewer, laptop=popular, comment='ok', rating=rating)
+        for reviewer, rating in zip(users, (5, 3, None))
+    ]
+
+    popular.refresh_from_db()
+    assert (popular.review_count, popular.rating_count, popular.rating_sum) == (3, 2, 8)
+    assert popular.average_rating == 4
+    assert popular.last_reviewed_at == reviews[-1].created_at
+
+    # Saving an instance loaded before the reviews keeps the counters.
+    stale.name = 'popular-renamed'
+    stale.save()
+    reviews[1].rating = 1
+    reviews[1].save()
+    reviews[2].delete()
+    popular.refresh_from_db()
+    assert (popular.name, popular.review_count, popular.rating_count, popular.rating_sum) == ('popular-renamed', 2, 2, 6)
+    assert popular.last_reviewed_at == reviews[1].created_at
+
+    url = reverse('product-list', kwargs={'store_pk': store.pk})
+    assert list(client.get(url).context['products']) == [quiet, popular]
+    assert list(client.get(url, {'sort': 'popular'}).context['products']) == [popular, quiet]
+    rows = client.get(reverse('api-laptop-list'), {'min_reviews': 1, 'fields': 'review_count'}).json()['data']
+    assert rows == [{'id': popular.pk, 'review_count': 2}]
+
+    Laptop.objects.filter(pk=popular.pk).update(review_count=7, rating_sum=0)
+    Laptop.objects.filter(pk=quiet.pk).update(last_reviewed_at=now())
+    stdout = io.StringIO()
+    call_command('reconcile_review_aggregates', dry_run=True, stdout=stdout)
+    assert 'Found 2 drifted' in stdout.getvalue()
+    call_command('reconcile_review_aggregates', stdout=io.StringIO())
+    popular.refresh_from_db()
+    quiet.refresh_from_db()
+    assert (popular.review_count, popular.rating_sum, quiet.last_reviewed_at) == (2, 6, None)
+    assert list(client.get(url, {'sort': 'popular'}).context['products']) == [popular, quiet]
+
+
+@pytest.mark.django_db
+def test_saving_a_partly_loaded_laptop_skips_deferred_fields(user):
+    store = Store.objects.create(title='Deferred Store', user=user)
+    laptop = Laptop.objects.defer('url', 'search_vector').get(pk=make_laptop(store, 'partial', Decimal('900')).pk)
+    laptop.name = 'renamed'
+    with CaptureQueriesContext(connection) as queries:
+        laptop.save()
+    updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "gamingapp_laptop"')]
+    assert len(updates) == 1 and '"url"' not in updates[0] and '"name"' in updates[0]
+    assert not [q for q in queries if q['sql'].startswith('SELECT "gamingapp_laptop"."id", "gamingapp_laptop"."url"')]
+    assert Laptop.objects.get(pk=laptop.pk).url == 'https://example.com/partial'
+
+
+@pytest.mark.django_db
+def test_review_added_keeps_latest_review_time(user):
+    store = Store.objects.create(title='Review Store', user=user)
+    laptop = make_laptop(store, 'reviewed', Decimal('1000'))
+    latest = now()
+    review_stats.review_added(laptop.pk, 4, latest)
+    review_stats.review_added(laptop.pk, 2, latest - timedelta(days=3))
+    laptop.refresh_from_db()
+    assert (laptop.review_count, laptop.rating_sum, laptop.last_reviewed_at) == (2, 6, latest)
+
+
+def test_sampling_filter_keeps_every_nth_info_record():
+    sampling = SamplingFilter({'gamingapp.views': 0.25, 'gamingapp.views.quiet': 0})
+
+    def record(name, level=logging.INFO):
+        return logging.LogRecord(name, level, __file__, 1, 'message', (), None)
+
+    assert [sampling.filter(record('gamingapp.views')) for _ in range(8)] == [True, False, False, False] * 2
+    assert not sampling.filter(record('gamingapp.views.quiet'))
+    assert sampling.filter(record('gamingapp.views.quiet', logging.WARNING))
+    assert sampling.filter(record('django.request'))
+
+
+def test_queueing_handler_writes_json_batches_and_rotates(tmp_path):
+    path = tmp_path / 'app.log'
+    handler = QueueingHandler({
+        'class': 'gamingapp.log.BatchingRotatingFileHandler',
+        'filename': str(path),
+        'max_bytes': 2000,
+        'backup_count': 5,
+        'batch_size': 10,
+    })
+    handler.setFormatter(JsonFormatter())
+    logger = logging.getLogger('gamingapp.tests.queue')
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning('row %d of %s', 0, 'batch', extra={'store': 7})
+        for i in range(1, 30):
+            logger.warning('row %d of %s', i, 'batch')
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            logger.exception('failed')
+        handler.flush()
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    files = sorted(tmp_path.iterdir())
+    assert [file.name for file in files][:2] == ['app.log', 'app.log.1']
+    assert all(file.stat().st_size <= 2000 for file in files)
+    entries = [json.loads(line) for file in reversed(files) for line in file.read_text().splitlines()]
+    assert entries[0]['message'] == 'row 0 of batch' and entries[0]['store'] == 7
+    assert entries[0]['logger'] == 'gamingapp.tests.queue'
+    assert entries[-1]['message'] == 'failed' and 'ValueError: boom' in entries[-1]['exc']
+    assert len(entries) == 31
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+def test_file_handler_writes_one_file_per_process(tmp_path):
+    handler = BatchingRotatingFileHandler(str(tmp_path / 'app.{pid}.log'), max_bytes=2000, batch_size=10)
+    handler.setFormatter(JsonFormatter())
+
+    def record(message):
+        return logging.LogRecord('gamingapp.tests.fork', logging.WARNING, __file__, 1, message, (), None)
+
+    handler.emit(record('parent'))
+    pid = os.fork()
+    if pid == 0:
+        try:
+            handler.emit(record('child'))
+            handler.close()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    handler.close()
+
+    files = {file.name: file.read_text() for file in tmp_path.iterdir()}
+    assert set(files) == {f'app.{os.getpid()}.log', f'app.{pid}.log'}
+    assert [json.loads(line)['message'] for line in files[f'app.{os.getpid()}.log'].splitlines()] == ['parent']
+    assert [json.loads(line)['message'] for line in files[f'app.{pid}.log'].splitlines()] == ['child']
+
+
+@pytest.mark.django_db
+def test_cached_user_and_session_fast_path(client, user, settings):
+    from django.contrib.auth.models import Permission
+
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.AUTHENTICATION_BACKENDS = [
+        'gamingapp.auth_backends.CachedModelBackend', 'django.contrib.auth.backends.ModelBackend',
+    ]
+    client.login(username='testuser', password='testpassword')
+    url = reverse('category')
+    client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(url).status_code == 200
+    assert not [q for q in queries if 'django_session' in q['sql'] or 'FROM "auth_user"' in q['sql']]
+
+    # Permission changes drop the cached user as well.
+    user.user_permissions.add(Permission.objects.get(codename='add_store'))
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    assert [q for q in queries if 'FROM "auth_user"' in q['sql']]
+
+    # Saving the user drops the cached copy; a new password ends the session.
+    user.set_password('changed-password')
+    user.save()
+    response = client.get(reverse('lower-prices', kwargs={'store_pk': 1, 'product_pk': 1}))
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+def test_password_hasher_policy_upgrades_on_login(client, settings):
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+    response = client.post(reverse('signup'), {
+        'username': 'newcomer', 'password1': 'a-Strong-pass-123', 'password2': 'a-Strong-pass-123',
+    })
+    assert response.status_code == 302
+    newcomer = User.objects.get(username='newcomer')
+    assert newcomer.password.startswith('pbkdf2_sha256$1000$')
+
+    settings.PASSWORD_PBKDF2_ITERATIONS = 2000
+    assert client.login(username='newcomer', password='a-Strong-pass-123')
+    newcomer.refresh_from_db()
+    assert newcomer.password.startswith('pbkdf2_sha256$2000$')
+
+
+INDEX_SCANS = ('USING INDEX', 'USING COVERING INDEX', 'Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+
+@pytest.fixture
+def seeded_catalog(user):
+    rng = random.Random(23)
+    stores = Store.objects.bulk_create(Store(title=f'Store {i}', user=user) for i in range(20))
+    laptops = Laptop.objects.bulk_create(
+        Laptop(
+            name=f'Laptop {i}', screen_size=rng.choice([13.3, 14, 15.6, 17.3]), price=Decimal(rng.randint(300, 3000)),
+            processor=rng.randint(1, 9), graphics_card=rng.randint(1, 9), ram=rng.choice([8, 16, 32]),
+            storage=rng.choice([256, 512, 1024]), url=f'https://example.com/laptop-{i}',
+        )
+        for i in range(2000)
+    )
+    Laptop.owner.through.objects.bulk_create(
+        Laptop.owner.through(laptop_id=laptop.pk, store_id=stores[i % len(stores)].pk) for i, laptop in enumerate(laptops)
+    )
+    Review.objects.create(user=user, laptop=laptops[0], comment='Fine')
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        if connection.vendor == 'postgresql':
+            # A seeded dataset this small is cheaper to scan; check that the
+            # indexes can answer the queries, not the planner's cost model.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return stores, laptops
+
+
+@pytest.mark.django_db
+def test_hot_queries_use_indexes(seeded_catalog, user):
+    from .deals import better_deals, dominated_queryset
+
+    stores, laptops = seeded_catalog
+    laptop = laptops[5]
+    hot_queries = {
+        'store listing': (Laptop.objects.filter(owner__pk=stores[0].pk), 'laptop_owner_store_laptop_idx'),
+        'popular listing': (
+            Laptop.objects.filter(owner__pk=stores[0].pk).order_by('-review_count', '-id'),
+            'laptop_owner_store_laptop_idx',
+        ),
+        'latest laptops': (Laptop.objects.all()[:25], 'laptop_created_idx'),
+        'dominating': (dominating_queryset(laptop), 'laptop_dominance_idx'),
+        'dominated': (dominated_queryset(laptop), 'laptop_dominance_idx'),
+        'better deals': (better_deals(laptop), 'better_deal_lookup_idx'),
+        'import upsert': (Laptop.objects.filter(url__in=[laptop.url]), 'laptop_url_idx'),
+        # Review.user is unique, so its own index answers (user, laptop).
+        'user review': (Review.objects.filter(user=user, laptop=laptop), None),
+    }
+    for name, (queryset, index) in hot_queries.items():
+        plan = queryset.explain()
+        assert any(scan in plan for scan in INDEX_SCANS), f'{name}: {plan}'
+        assert index is None or index in plan, f'{name}: {plan}'
+
+
+@pytest.mark.django_db
+def test_generate_catalog_command():
+    from .review_stats import reconcile
+
+    out = io.StringIO()
+    call_command('generate_catalog', laptops=400, stores=5, users=60, reviews=50, json=True, stdout=out)
+    report = json.loads(out.getvalue())
+    assert {key: report[key] for key in ('users', 'stores', 'laptops', 'reviews')} == {
+        'users': 60, 'stores': 5, 'laptops': 400, 'reviews': 50,
+    }
+    assert report['links'] == Laptop.owner.through.objects.count()
+    assert Laptop.objects.filter(owner__isnull=True).count() == 0
+    assert reconcile(dry_run=True) == []
+    assert BetterDeal.objects.exists()
+
+    # Specs follow a common tier, so better processors come with higher prices.
+    prices = {
+        processor: Laptop.objects.filter(processor=processor).aggregate(avg=Avg('price'))['avg']
+        for processor in (2, 8)
+    }
+    assert prices[8] > 2 * prices[2]
+
+    with pytest.raises(CommandError):
+        call_command('generate_catalog', laptops=10, users=1, reviews=5)
+
+
+@pytest.mark.django_db
+def test_generate_bumps_versions_on_commit_and_never_reuses_names(django_capture_on_commit_callbacks):
+    from .catalog import get_version
+    from .synthetic import generate
+
+    version = get_version('laptop')
+    with django_capture_on_commit_callbacks() as callbacks:
+        generate(users=3, stores=1, laptops=3, deals=False)
+    assert get_version('laptop') == version
+    for callback in callbacks:
+        callback()
+    assert get_version('laptop') != version
+
+    # Numbering by count() would start again at a name that is still taken.
+    User.objects.filter(store__isnull=True).first().delete()
+    Laptop.objects.order_by('pk').first().delete()
+    generate(users=2, stores=1, laptops=2, deals=False)
+    assert User.objects.filter(username__startswith='synthetic-').count() == 4
+    assert len(set(Laptop.objects.values_list('url', flat=True))) == 4
+
+
+def test_perf_search_routes_render_results(perf_catalog):
+    client, paths = perf_catalog
+    for route in ('product-list', 'product-list-async', 'search-products', 'search-products-async'):
+        path, query = paths[route]
+        assert len(client.get(path, query).context['products']) > 0, route
+
+
+def budget(route, max_queries, max_ms=250, max_memory_kb=2048):
+    return pytest.param(route, marks=pytest.mark.perf_budget(
+        max_queries=max_queries, max_ms=max_ms, max_memory_kb=max_memory_kb,
+    ), id=route)
+
+
+@pytest.mark.parametrize('route', [
+    budget('category', 3),
+    budget('store-list', 1),
+    budget('store-detail', 2),
+    budget('product-list', 5),
+    budget('product-list-async', 3),
+    budget('product-facets', 2),
+    budget('product-export', 2),
+    budget('lower-prices', 4),
+    budget('lower-prices-other', 4),
+    budget('search-products', 3),
+    budget('search-products-async', 1),
+    budget('review', 3),
+    budget('user-review', 4),
+    budget('review-async', 3),
+    budget('api-store-list', 1),
+    budget('api-laptop-list', 1),
+    budget('api-laptop-batch', 2),
+    budget('api-laptop-compare', 1),
+    budget('api-review-list', 1),
+    budget('metrics', 0),
+    budget('readiness', 1),
+])
+def test_view_performance_budget(perf_budget, route):
+    perf_budget(route)
@@ -0,0 +1,271 @@
+import json
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+
+from .compare import comparison
+from .dominance import DIMENSIONS
+from .models import Laptop, Review, Store, User
+from .pagination import InvalidCursor, decode_cursor, keyset_page
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Read-only JSON API, version 1. Rows are fetched with ``values()`` so list
+# endpoints never build model instances, paginated by an ``id`` keyset cursor,
+# and trimmed to the columns named in ``?fields=``. Related objects named in
+# ``?include=`` are loaded with one extra query per relation for the whole page
+# and embedded in each row. The batch endpoints take up to
+# ``API_BATCH_MAX_IDS`` laptop ids and answer in a fixed number of queries.
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+def api_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def _users(ids):
+    return {row['id']: row for row in User.objects.filter(pk__in=ids).values('id', 'username')}
+
+
+def _laptop_stores(laptop_ids):
+    stores = defaultdict(list)
+    links = Laptop.owner.through.objects.filter(laptop_id__in=laptop_ids).order_by('store_id')
+    for laptop_id, store_id in links.values_list('laptop_id', 'store_id'):
+        stores[laptop_id].append(store_id)
+    return stores
+
+
+def _laptop_reviews(laptop_ids):
+    reviews = defaultdict(list)
+    rows = Review.objects.filter(laptop_id__in=laptop_ids).order_by('pk').values(
+        'id', 'laptop_id', 'user', 'comment', 'rating', 'created_at',
+    )
+    for row in rows:
+        reviews[row.pop('laptop_id')].append(row)
+    return reviews
+
+
+def embed_user(rows):
+    users = _users({row['user'] for row in rows})
+    for row in rows:
+        row['user'] = users.get(row['user'])
+
+
+def embed_stores(rows):
+    stores = _laptop_stores([row['id'] for row in rows])
+    for row in rows:
+        row['stores'] = stores.get(row['id'], [])
+
+
+def embed_reviews(rows):
+    reviews = _laptop_reviews([row['id'] for row in rows])
+    for row in rows:
+        row['reviews'] = reviews.get(row['id'], [])
+
+
+def embed_laptop(rows):
+    fields = ('id', 'name', 'price', 'url')
+    laptops = {row['id']: row for row in Laptop.objects.filter(pk__in={row['laptop'] for row in rows}).values(*fields)}
+    for row in rows:
+        row['laptop'] = laptops.get(row['laptop'])
+
+
+class Resource:
+    """A model exposed under the API: its columns, filters and embeddable relations.
+
+    ``fields`` are the selectable ``values()`` columns (a foreign key column
+    holds the related id); ``includes`` maps relation names to functions that
+    embed them into a page of rows. An include that replaces a foreign key
+    column needs that column selected, see ``requires``.
+    """
+
+    def __init__(self, model, fields, filters=None, includes=None, requires=None):
+        self.model = model
+        self.fields = fields
+        self.filters = filters or {}
+        self.includes = includes or {}
+        self.requires = requires or {}
+
+    def _parse_list(self, request, name, allowed):
+        raw = request.GET.get(name)
+        if not raw:
+            return None
+        names = [value.strip() for value in raw.split(',') if value.strip()]
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise ApiError(f"Unknown {name}: {', '.join(unknown)}.")
+        return names
+
+    def columns(self, request, includes):
+        names = self._parse_list(request, 'fields', self.fields) or list(self.fields)
+        for include in includes:
+            if self.requires.get(include) and self.requires[include] not in names:
+                names.append(self.requires[include])
+        if 'id' not in names:
+            names.insert(0, 'id')
+        return names
+
+    def queryset(self, request):
+        queryset = self.model.objects.order_by('pk')
+        for param, lookup in self.filters.items():
+            value = request.GET.get(param)
+            if value is not None:
+                try:
+                    queryset = queryset.filter(**{lookup: int(value)})
+                except ValueError:
+                    raise ApiError(f"Invalid {param}: {value!r}.")
+        return queryset
+
+    def rows(self, queryset, names):
+        return queryset.values(*names)
+
+    def embed(self, rows, includes):
+        if rows:
+            for include in includes:
+                self.includes[include](rows)
+        return rows
+
+    def list(self, request):
+        includes = self._parse_list(request, 'include', self.includes) or []
+        names = self.columns(request, includes)
+        try:
+            cursor = request.GET.get('after')
+            cursor_values = decode_cursor(cursor, (int,)) if cursor else None
+        except InvalidCursor:
+            raise ApiError("Invalid cursor.")
+        page = keyset_page(self.rows(self.queryset(request), names), ('id',), cursor_values, page_size(request))
+        return {'data': self.embed(page.rows, includes), 'next_cursor': page.next_cursor}
+
+    def detail(self, request, pk):
+        includes = self._parse_list(request, 'include', self.includes) or []
+        names = self.columns(request, includes)
+        rows = list(self.rows(self.model.objects.filter(pk=pk), names))
+        if not rows:
+            raise ApiError("Not found.", status=404)
+        return {'data': self.embed(rows, includes)[0]}
+
+
+RESOURCES = {
+    'stores': Resource(
+        Store,
+        ('id', 'title', 'description', 'user', 'created_at', 'updated_at'),
+        filters={'user': 'user_id'},
+        includes={'user': embed_user},
+        requires={'user': 'user'},
+    ),
+    'laptops': Resource(
+        Laptop,
+        (
+            'id', 'name', 'screen_size', 'price', 'processor', 'graphics_card', 'ram', 'storage', 'url',
+            'review_count', 'last_reviewed_at', 'rating_count', 'rating_sum', 'created_at', 'updated_at',
+        ),
+        filters={'store': 'owner__pk', 'min_reviews': 'review_count__gte'},
+        includes={'stores': embed_stores, 'reviews': embed_reviews},
+    ),
+    'reviews': Resource(
+        Review,
+        ('id', 'laptop', 'user', 'comment', 'rating', 'created_at'),
+        filters={'laptop': 'laptop_id', 'user': 'user_id'},
+        includes={'user': embed_user, 'laptop': embed_laptop},
+        requires={'user': 'user', 'laptop': 'laptop'},
+    ),
+}
+
+
+def page_size(request):
+    default = getattr(settings, 'API_PAGE_SIZE', 50)
+    maximum = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+    try:
+        size = int(request.GET.get('page_size', default))
+    except ValueError:
+        size = default
+    return max(1, min(size, maximum))
+
+
+def resource_list(request, resource):
+    try:
+        return api_response(RESOURCES[resource].list(request))
+    except ApiError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+
+
+def resource_detail(request, resource, pk):
+    try:
+        return api_response(RESOURCES[resource].detail(request, pk))
+    except ApiError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+
+
+def parse_ids(request):
+    raw = request.GET.get('ids', '')
+    try:
+        ids = list(dict.fromkeys(int(value) for value in raw.split(',') if value.strip()))
+    except ValueError:
+        raise ApiError(f"Invalid ids: {raw!r}.")
+    if not ids:
+        raise ApiError("Pass laptop ids as ?ids=1,2,3.")
+    maximum = getattr(settings, 'API_BATCH_MAX_IDS', 100)
+    if len(ids) > maximum:
+        raise ApiError(f"At most {maximum} ids per request.")
+    return ids
+
+
+def _batch(ids, fields):
+    found = {row['id']: row for row in Laptop.objects.filter(pk__in=ids).values(*fields)}
+    return [found[pk] for pk in ids if pk in found], [pk for pk in ids if pk not in found]
+
+
+def laptops_batch(request):
+    """Specs, stores and review summary of several laptops in two queries."""
+    try:
+        ids = parse_ids(request)
+    except ApiError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+    rows, missing = _batch(ids, RESOURCES['laptops'].fields)
+
+    stores = defaultdict(list)
+    links = Laptop.owner.through.objects.filter(laptop_id__in=ids).order_by('store_id')
+    for laptop_id, store_id, title in links.values_list('laptop_id', 'store_id', 'store__title'):
+        stores[laptop_id].append({'id': store_id, 'title': title})
+    for row in rows:
+        row['stores'] = stores.get(row['id'], [])
+        row['reviews'] = {
+            'count': row.pop('review_count'),
+            'last_reviewed_at': row.pop('last_reviewed_at'),
+            'average_rating': row['rating_sum'] / row['rating_count'] if row['rating_count'] else None,
+        }
+        del row['rating_count'], row['rating_sum']
+    return api_response({'data': rows, 'missing': missing})
+
+
+def laptops_compare(request):
+    """Pairwise spec differences and dominance between several laptops."""
+    try:
+        ids = parse_ids(request)
+    except ApiError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+    rows, missing = _batch(ids, ('id',) + DIMENSIONS)
+    return api_response({'ids': [row['id'] for row in rows], 'missing': missing, **comparison(rows)})
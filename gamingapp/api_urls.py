@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import api
+
+# Mounted under api/v1/ in gaming/urls.py.
+urlpatterns = [
+    path('stores/', api.resource_list, {'resource': 'stores'}, name='api-store-list'),
+    path('stores/<int:pk>/', api.resource_detail, {'resource': 'stores'}, name='api-store-detail'),
+    path('laptops/', api.resource_list, {'resource': 'laptops'}, name='api-laptop-list'),
+    path('laptops/batch/', api.laptops_batch, name='api-laptop-batch'),
+    path('laptops/compare/', api.laptops_compare, name='api-laptop-compare'),
+    path('laptops/<int:pk>/', api.resource_detail, {'resource': 'laptops'}, name='api-laptop-detail'),
+    path('reviews/', api.resource_list, {'resource': 'reviews'}, name='api-review-list'),
+    path('reviews/<int:pk>/', api.resource_detail, {'resource': 'reviews'}, name='api-review-detail'),
+]
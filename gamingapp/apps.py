@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class GamingappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gamingapp'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import signals  # noqa: F401
+        from .template_registry import template_registry
+        template_registry.load()
+        if getattr(settings, 'TEMPLATE_PRECOMPILE', False):
+            template_registry.warm()
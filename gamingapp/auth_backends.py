@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .catalog import bump_version, get_version
+
+# Authenticated requests load request.user from the session's user id on
+# every request. CachedModelBackend keeps the user in the shared cache so that
+# costs a cache hit instead of a query. gamingapp.signals drops a user's entry
+# when the user is saved or deleted or their groups or permissions change, and
+# changes to a group's permissions move the ``auth`` stamp that is part of
+# every key. Writes that bypass the signals (``User.objects.update()``, raw
+# SQL) are only picked up when the short timeout expires, and the backend is
+# only installed when the cache is shared between processes (see settings).
+
+USER_CACHE_TIMEOUT = 30
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{get_version('auth')}:{user_id}"
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def forget_all_users():
+    bump_version('auth')
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', USER_CACHE_TIMEOUT))
+        return user
@@ -0,0 +1,91 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class LocalLRUCache(BaseCache):
+    """Per-process L1 cache: size-bounded LRU with TTL.
+
+    Unlike LocMemCache, values are kept as-is rather than pickled, so a hit
+    costs a dict lookup. Only store immutable values (tuples, strings, bytes).
+    The least recently used entry is evicted once ``MAX_ENTRIES`` is reached.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def _expiry(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return float('inf') if timeout is None else timeout
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _store(self, key, value, timeout):
+        self._data[key] = (value, self._expiry(timeout))
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_entries:
+            self._data.popitem(last=False)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._store(key, value, timeout)
+            return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            entry = self._live(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            self._store(key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return False
+            self._data[key] = (entry[0], self._expiry(timeout))
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = entry[0] + delta
+            self._data[key] = (value, entry[1])
+        return value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            return self._live(key) is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,66 @@
+import time
+
+from django.core.cache import cache
+
+# Version stamps let in-process structures and cached data notice catalog
+# writes made by any worker: readers compare the stamp they were built with
+# against the current one, writers simply bump it. A stamp that was evicted
+# is re-seeded from the clock so it never repeats an earlier value. Stamps
+# are only seen by other processes when the default cache is shared (Redis
+# via CACHE_URL); with the per-process fallback each worker only notices its
+# own writes, which is why settings turn the response and facet caches off.
+#
+# Anything cached under a stamp is read from the primary database: a lagging
+# replica would otherwise attach stale rows to the new stamp until the next
+# write bumps it again.
+
+VERSION_TIMEOUT = None
+
+
+def _version_key(namespace, pk=None):
+    if pk is None:
+        return f"catalog_version:{namespace}"
+    return f"catalog_version:{namespace}:{pk}"
+
+
+def _seed():
+    return time.time_ns()
+
+
+def get_version(namespace, pk=None):
+    key = _version_key(namespace, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), timeout=VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(stamps):
+    """Current versions of several (namespace, pk) stamps in one round trip."""
+    keys = {stamp: _version_key(*stamp) for stamp in stamps}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for stamp, key in keys.items():
+        version = found.get(key)
+        versions[stamp] = get_version(*stamp) if version is None else version
+    return versions
+
+
+async def aget_version(namespace, pk=None):
+    key = _version_key(namespace, pk)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _seed(), timeout=VERSION_TIMEOUT)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(namespace, pk=None):
+    key = _version_key(namespace, pk)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _seed()
+        cache.set(key, version, timeout=VERSION_TIMEOUT)
+        return version
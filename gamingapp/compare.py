@@ -0,0 +1,47 @@
+from .dominance import DIMENSIONS, SPEC_FIELDS
+
+# Pairwise comparison of a batch of laptops. The batch is held column-wise,
+# one list per dimension, and every matrix is built from whole columns rather
+# than per-pair model lookups. ``differences[dim][i][j]`` is laptop i's value
+# minus laptop j's; ``dominates[i][j]`` is true when laptop i is a better deal
+# than laptop j in the sense of ``gamingapp.dominance``.
+#
+# Columns keep the database types, so price differences are exact Decimals
+# (serialized as strings like the prices themselves). Float columns such as
+# screen_size are rounded to FLOAT_PLACES, which drops binary noise like
+# 2.3000000000000007.
+
+FLOAT_PLACES = 2
+
+
+def columns(rows):
+    return {dimension: [row[dimension] for row in rows] for dimension in DIMENSIONS}
+
+
+def _difference(a, b):
+    difference = a - b
+    return round(difference, FLOAT_PLACES) if isinstance(difference, float) else difference
+
+
+def difference_matrix(column):
+    return [[_difference(a, b) for b in column] for a in column]
+
+
+def dominance_matrix(cols):
+    prices = cols['price']
+    specs = list(zip(*(cols[field] for field in SPEC_FIELDS)))
+    return [
+        [
+            price_i < price_j and all(a >= b for a, b in zip(specs_i, specs_j))
+            for price_j, specs_j in zip(prices, specs)
+        ]
+        for price_i, specs_i in zip(prices, specs)
+    ]
+
+
+def comparison(rows):
+    cols = columns(rows)
+    return {
+        'differences': {dimension: difference_matrix(column) for dimension, column in cols.items()},
+        'dominates': dominance_matrix(cols),
+    }
@@ -0,0 +1,47 @@
+import hashlib
+
+from django.conf import settings
+
+from .catalog import get_versions
+from .models import Store
+
+# ETags for conditional GETs, computed before the view renders anything so a
+# client polling an unchanged page gets a 304 cheaply. Catalog pages take their
+# tag from the version stamps (gamingapp.catalog) that already invalidate
+# their cached data: one cache round trip and no query. The stamps are bumped
+# by every write that can change those pages, link changes of Laptop.owner
+# included, which no aggregate over updated_at can see. They only move in
+# every worker when the default cache is shared, so without CACHE_URL these
+# pages send no ETag. No Last-Modified header is sent either: If-Modified-Since
+# would wrongly match after a laptop is removed.
+
+
+def _etag(*parts):
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _stamps_etag(name, *stamps):
+    if not getattr(settings, 'SHARED_CACHE', False):
+        return None
+    versions = get_versions(stamps)
+    return _etag(name, *((stamp, versions[stamp]) for stamp in stamps))
+
+
+def store_laptops_etag(request, store_pk):
+    return _stamps_etag('store-laptops', ('store-laptops', store_pk))
+
+
+def store_etag(request, pk):
+    state = Store.objects.filter(pk=pk).values_list('updated_at', 'user__username').first()
+    if state is None:
+        return None
+    return _etag('store', pk, *state)
+
+
+def lower_prices_etag(request, store_pk, product_pk):
+    # The pages redirect anonymous users; never short-circuit that with a 304.
+    if not request.user.is_authenticated:
+        return None
+    # ``deals`` moves with every change to the BetterDeal table, renamed
+    # alternatives included; ``store-laptops`` when the product leaves the store.
+    return _stamps_etag('lower-prices', ('laptop', product_pk), ('deals', None), ('store-laptops', store_pk))
@@ -0,0 +1,104 @@
+import threading
+import time
+import weakref
+
+from django.db import connections
+
+# Connection metrics for /metrics. Every DatabaseWrapper that ever connected is
+# remembered (weakly) with the thread that owns it; a connection counts as in
+# use while that thread is handling a request.
+#
+# Connections are persistent (CONN_MAX_AGE) rather than pooled, so waiting for
+# a connection means the health check of a reused one and opening a new one
+# when it failed or expired. ``ConnectionTimingMixin`` times both; the
+# database backend in ``gamingapp.db_backends.postgresql`` applies it.
+
+_wrappers = weakref.WeakKeyDictionary()
+_opened = {}
+_active_threads = set()
+# alias -> [acquisitions, seconds, health check failures]
+_acquisitions = {}
+
+
+def connection_opened(connection):
+    _wrappers[connection] = threading.get_ident()
+    _opened[connection.alias] = _opened.get(connection.alias, 0) + 1
+
+
+def request_started():
+    _active_threads.add(threading.get_ident())
+
+
+def request_finished():
+    _active_threads.discard(threading.get_ident())
+
+
+def _record_acquisition(alias, seconds, failed=False):
+    stats = _acquisitions.get(alias)
+    if stats is None:
+        stats = _acquisitions.setdefault(alias, [0, 0.0, 0])
+    stats[0] += 1
+    stats[1] += seconds
+    stats[2] += failed
+
+
+class ConnectionTimingMixin:
+    """``DatabaseWrapper`` mixin that times handing out a usable connection.
+
+    A connection is acquired when a cursor is first needed in a request:
+    either the persistent connection passes its health check, or a new one is
+    opened. Cursors on an already checked connection are not counted.
+    """
+
+    def close_if_health_check_failed(self):
+        if self.connection is None or not self.health_check_enabled or self.health_check_done:
+            return super().close_if_health_check_failed()
+        started = time.perf_counter()
+        super().close_if_health_check_failed()
+        if self.connection is None:
+            # Failed; the new connection opened next is timed as its own acquisition.
+            _record_acquisition(self.alias, time.perf_counter() - started, failed=True)
+        else:
+            _record_acquisition(self.alias, time.perf_counter() - started)
+
+    def ensure_connection(self):
+        if self.connection is not None:
+            return super().ensure_connection()
+        started = time.perf_counter()
+        super().ensure_connection()
+        _record_acquisition(self.alias, time.perf_counter() - started)
+
+
+def pool_metrics():
+    """Gauges in the ``extra`` format of ``metrics.render_prometheus``."""
+    opened, in_use, idle = {}, {}, {}
+    for alias in connections:
+        key = (('alias', alias),)
+        opened[key] = _opened.get(alias, 0)
+        in_use[key] = 0
+        idle[key] = 0
+    for wrapper, thread_id in list(_wrappers.items()):
+        if wrapper.connection is None:
+            continue
+        key = (('alias', wrapper.alias),)
+        if thread_id in _active_threads:
+            in_use[key] = in_use.get(key, 0) + 1
+        else:
+            idle[key] = idle.get(key, 0) + 1
+
+    acquired, waited, failed = {}, {}, {}
+    for alias in connections:
+        key = (('alias', alias),)
+        acquired[key], waited[key], failed[key] = _acquisitions.get(alias, (0, 0.0, 0))
+
+    return [
+        ('gaming_db_connections_opened_total', 'counter', 'Database connections opened by this process.', opened),
+        ('gaming_db_connections_in_use', 'gauge', 'Open connections held by a thread serving a request.', in_use),
+        ('gaming_db_connections_idle', 'gauge', 'Open persistent connections waiting for a request.', idle),
+        ('gaming_db_connection_acquisitions_total', 'counter',
+         'Connections handed out after a health check or a new connect.', acquired),
+        ('gaming_db_connection_wait_seconds_total', 'counter',
+         'Time spent health-checking and opening connections.', waited),
+        ('gaming_db_connection_health_check_failures_total', 'counter',
+         'Persistent connections that failed their health check.', failed),
+    ]
@@ -0,0 +1,100 @@
+from django.db import transaction
+
+from .catalog import bump_version
+from .dominance import DIMENSIONS, dominance_index, dominating_queryset
+from .models import BetterDeal, Laptop
+
+# ``BetterDeal`` materializes the dominance relation so the lower-price views
+# become a single lookup on (laptop, price). Rows are maintained incrementally
+# from the Laptop signals in ``gamingapp.signals``; deletions are handled by the
+# foreign key cascade. ``rebuild_better_deals`` repopulates the table in bulk.
+# Every change bumps the ``deals`` catalog version.
+
+BATCH_SIZE = 1000
+
+
+def dominated_queryset(laptop):
+    """Laptops for which ``laptop`` is a better deal."""
+    return Laptop.objects.filter(
+        price__gt=laptop.price,
+        screen_size__lte=laptop.screen_size,
+        processor__lte=laptop.processor,
+        graphics_card__lte=laptop.graphics_card,
+        ram__lte=laptop.ram,
+        storage__lte=laptop.storage,
+    ).order_by()
+
+
+@transaction.atomic
+def refresh_laptop(laptop):
+    """Recompute every row that ``laptop`` takes part in."""
+    BetterDeal.objects.filter(laptop=laptop).delete()
+    BetterDeal.objects.filter(alternative=laptop).delete()
+
+    deals = [
+        BetterDeal(laptop_id=laptop.pk, alternative_id=pk, price=price)
+        for pk, price in dominating_queryset(laptop).values_list('pk', 'price').iterator()
+    ]
+    deals.extend(
+        BetterDeal(laptop_id=pk, alternative_id=laptop.pk, price=laptop.price)
+        for pk in dominated_queryset(laptop).values_list('pk', flat=True).iterator()
+    )
+    BetterDeal.objects.bulk_create(deals, batch_size=BATCH_SIZE)
+    bump_version('deals')
+
+
+@transaction.atomic
+def refresh_laptops(pks, batch_size=BATCH_SIZE):
+    """``refresh_laptop`` for many laptops at once, from the dominance index.
+
+    Two deletes and one bulk insert per ``batch_size`` laptops instead of a
+    transaction with two range queries per laptop; for bulk writes that
+    bypass the Laptop signals.
+    """
+    imported = set(pks)
+    for start in range(0, len(pks), batch_size):
+        chunk = pks[start:start + batch_size]
+        BetterDeal.objects.filter(laptop_id__in=chunk).delete()
+        BetterDeal.objects.filter(alternative_id__in=chunk).delete()
+
+    batch = []
+    created = 0
+    for start in range(0, len(pks), batch_size):
+        for laptop in Laptop.objects.filter(pk__in=pks[start:start + batch_size]).only(*DIMENSIONS):
+            for pk, price in dominance_index.iter_dominating(laptop, with_price=True):
+                batch.append(BetterDeal(laptop_id=laptop.pk, alternative_id=pk, price=price))
+            # A pair of imported laptops is already added from the dominated side.
+            batch.extend(
+                BetterDeal(laptop_id=pk, alternative_id=laptop.pk, price=laptop.price)
+                for pk in dominance_index.iter_dominated(laptop) if pk not in imported
+            )
+            if len(batch) >= batch_size:
+                BetterDeal.objects.bulk_create(batch, batch_size=batch_size)
+                created += len(batch)
+                batch = []
+    BetterDeal.objects.bulk_create(batch, batch_size=batch_size)
+    bump_version('deals')
+    return created + len(batch)
+
+
+@transaction.atomic
+def rebuild_all(batch_size=BATCH_SIZE):
+    """Repopulate the whole table from the in-process dominance index."""
+    BetterDeal.objects.all().delete()
+    prices = dict(Laptop.objects.order_by().values_list('pk', 'price').iterator())
+    batch = []
+    created = 0
+    for laptop in Laptop.objects.order_by().only(*DIMENSIONS).iterator(chunk_size=batch_size):
+        for pk in dominance_index.iter_dominating(laptop):
+            batch.append(BetterDeal(laptop_id=laptop.pk, alternative_id=pk, price=prices[pk]))
+            if len(batch) >= batch_size:
+                BetterDeal.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+    BetterDeal.objects.bulk_create(batch)
+    bump_version('deals')
+    return created + len(batch)
+
+
+def better_deals(laptop):
+    return BetterDeal.objects.filter(laptop=laptop).select_related('alternative')
@@ -0,0 +1,168 @@
+import heapq
+import itertools
+import threading
+
+from django.db import DEFAULT_DB_ALIAS
+
+from .catalog import get_version
+from .models import Laptop
+
+# A laptop "dominates" another when it is strictly cheaper and at least as good
+# on every spec below. Answering "cheapest laptops that dominate X" is an
+# orthogonal range query, so the catalog is kept in a k-d tree whose nodes carry
+# the bounding box of their subtree. Subtrees that cannot hold a match are
+# pruned, and a best-first walk keyed on each subtree's minimum price yields
+# matches cheapest first without visiting the rest of the tree.
+
+SPEC_FIELDS = ('screen_size', 'processor', 'graphics_card', 'ram', 'storage')
+DIMENSIONS = ('price',) + SPEC_FIELDS
+LEAF_SIZE = 16
+
+_ID = len(DIMENSIONS)
+
+
+class _Node:
+    __slots__ = ('lo', 'hi', 'left', 'right', 'points')
+
+    def __init__(self, points, depth):
+        self.lo = tuple(min(p[axis] for p in points) for axis in range(_ID))
+        self.hi = tuple(max(p[axis] for p in points) for axis in range(_ID))
+        if len(points) <= LEAF_SIZE:
+            self.left = self.right = None
+            self.points = points
+            return
+        axis = depth % _ID
+        points.sort(key=lambda p: p[axis])
+        middle = len(points) // 2
+        self.points = None
+        self.left = _Node(points[:middle], depth + 1)
+        self.right = _Node(points[middle:], depth + 1)
+
+
+def _can_contain(node, price, specs):
+    if node.lo[0] >= price:
+        return False
+    for axis, minimum in enumerate(specs, start=1):
+        if node.hi[axis] < minimum:
+            return False
+    return True
+
+
+def _dominates(point, price, specs):
+    if point[0] >= price:
+        return False
+    for axis, minimum in enumerate(specs, start=1):
+        if point[axis] < minimum:
+            return False
+    return True
+
+
+def _can_be_dominated(node, price, specs):
+    if node.hi[0] <= price:
+        return False
+    for axis, maximum in enumerate(specs, start=1):
+        if node.lo[axis] > maximum:
+            return False
+    return True
+
+
+def _dominated(point, price, specs):
+    if point[0] <= price:
+        return False
+    for axis, maximum in enumerate(specs, start=1):
+        if point[axis] > maximum:
+            return False
+    return True
+
+
+def _laptop_key(laptop):
+    return laptop.price, tuple(getattr(laptop, field) for field in SPEC_FIELDS)
+
+
+def dominating_queryset(laptop):
+    """Database equivalent of ``DominanceIndex.dominating``."""
+    return Laptop.objects.filter(
+        price__lt=laptop.price,
+        screen_size__gte=laptop.screen_size,
+        processor__gte=laptop.processor,
+        graphics_card__gte=laptop.graphics_card,
+        ram__gte=laptop.ram,
+        storage__gte=laptop.storage,
+    ).order_by('price', 'pk')
+
+
+class DominanceIndex:
+    """In-process k-d tree over the laptop catalog.
+
+    The tree is rebuilt lazily whenever the ``laptop`` catalog version moves,
+    so writes made by any worker are picked up on the next query.
+    """
+
+    def __init__(self):
+        self._root = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        rows = Laptop.objects.using(DEFAULT_DB_ALIAS).order_by().values_list(*DIMENSIONS, 'pk')
+        points = list(rows.iterator(chunk_size=2000))
+        return _Node(points, 0) if points else None
+
+    def _current_root(self):
+        version = get_version('laptop')
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._root = self._load()
+                    self._version = version
+        return self._root
+
+    def iter_dominating(self, laptop, with_price=False):
+        """Yield ids of laptops dominating ``laptop``, ordered by (price, id).
+
+        With ``with_price``, yield ``(id, price)`` pairs instead.
+        """
+        root = self._current_root()
+        if root is None:
+            return
+        price, specs = _laptop_key(laptop)
+        if not _can_contain(root, price, specs):
+            return
+        counter = itertools.count()
+        heap = [(root.lo[0], -1, next(counter), root)]
+        while heap:
+            key, pk, _, item = heapq.heappop(heap)
+            if pk != -1:
+                yield (pk, key) if with_price else pk
+                continue
+            if item.points is not None:
+                for point in item.points:
+                    if _dominates(point, price, specs):
+                        heapq.heappush(heap, (point[0], point[_ID], next(counter), None))
+                continue
+            for child in (item.left, item.right):
+                if _can_contain(child, price, specs):
+                    heapq.heappush(heap, (child.lo[0], -1, next(counter), child))
+
+    def dominating(self, laptop, limit=None):
+        return list(itertools.islice(self.iter_dominating(laptop), limit))
+
+    def iter_dominated(self, laptop):
+        """Yield ids of laptops that ``laptop`` dominates, in no particular order."""
+        root = self._current_root()
+        price, specs = _laptop_key(laptop)
+        stack = [root] if root is not None else []
+        while stack:
+            node = stack.pop()
+            if not _can_be_dominated(node, price, specs):
+                continue
+            if node.points is None:
+                stack.extend((node.left, node.right))
+                continue
+            for point in node.points:
+                if _dominated(point, price, specs):
+                    yield point[_ID]
+
+
+dominance_index = DominanceIndex()
+
@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from .imports import FIELDS
+from .models import Laptop, Review
+
+# Streaming catalog export. Laptops are read with a server-side cursor
+# (``iterator(chunk_size=...)``, reviews prefetched one chunk at a time) and
+# encoded one block of rows at a time, so memory stays flat however large the
+# store is and the first bytes leave before the query has been fully read.
+# The columns match ``gamingapp.imports`` so an export can be imported again.
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+EXPORT_FIELDS = ['id'] + FIELDS + ['created_at', 'updated_at']
+REVIEW_FIELDS = ['review_id', 'review_user', 'review_comment']
+CHUNK_SIZE = 2000
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', CHUNK_SIZE)
+
+
+def export_queryset(store_pk, reviews=False):
+    laptops = Laptop.objects.filter(owner__pk=store_pk).order_by('pk').only(*EXPORT_FIELDS)
+    if reviews:
+        laptops = laptops.prefetch_related(Prefetch(
+            'reviews',
+            queryset=Review.objects.select_related('user').only('laptop_id', 'comment', 'user__username').order_by('pk'),
+        ))
+    return laptops.iterator(chunk_size=chunk_size())
+
+
+def _laptop_values(laptop):
+    return {field: getattr(laptop, field) for field in EXPORT_FIELDS}
+
+
+def _review_values(review):
+    return {'id': review.pk, 'user': review.user.username, 'comment': review.comment}
+
+
+def _blocks(laptops, encode_block):
+    block = []
+    for laptop in laptops:
+        block.append(laptop)
+        if len(block) >= chunk_size():
+            yield encode_block(block)
+            block = []
+    if block:
+        yield encode_block(block)
+
+
+def export_csv(laptops, reviews=False):
+    """Yield CSV text; with ``reviews`` there is one line per review."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    def encode_block(block):
+        for laptop in block:
+            values = [getattr(laptop, field) for field in EXPORT_FIELDS]
+            if not reviews:
+                writer.writerow(values)
+                continue
+            laptop_reviews = laptop.reviews.all()
+            if not laptop_reviews:
+                writer.writerow(values + ['', '', ''])
+            for review in laptop_reviews:
+                writer.writerow(values + [review.pk, review.user.username, review.comment])
+        return flush()
+
+    writer.writerow(EXPORT_FIELDS + (REVIEW_FIELDS if reviews else []))
+    yield flush()
+    yield from _blocks(laptops, encode_block)
+
+
+def export_jsonl(laptops, reviews=False):
+    """Yield JSON Lines text; reviews are embedded as a list per laptop."""
+    def encode_line(laptop):
+        values = _laptop_values(laptop)
+        if reviews:
+            values['reviews'] = [_review_values(review) for review in laptop.reviews.all()]
+        return json.dumps(values, cls=DjangoJSONEncoder) + '\n'
+
+    yield from _blocks(laptops, lambda block: ''.join(encode_line(laptop) for laptop in block))
+
+
+EXPORTERS = {'csv': export_csv, 'jsonl': export_jsonl}
+
+
+def gzip_stream(chunks, level=6):
+    """Gzip a stream of text, flushing after each chunk so clients see progress."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_store(store_pk, fmt, reviews=False, compress=False):
+    chunks = EXPORTERS[fmt](export_queryset(store_pk, reviews), reviews)
+    if compress:
+        return gzip_stream(chunks)
+    return (chunk.encode() for chunk in chunks)
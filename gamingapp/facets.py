@@ -0,0 +1,163 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Q
+
+from . import metrics
+from .catalog import aget_version, get_version
+
+# Faceted filtering for a store's laptops. Every facet is a fixed set of
+# half-open ranges [lower, upper); all bucket counts plus the total come back
+# from one aggregate query, cached per store and per active filter set. The
+# cache key carries the store's catalog version, bumped from the Laptop and
+# Laptop.owner signals, so counts are never served stale as long as the
+# cache is shared between processes (see CACHES in settings).
+
+FACET_RANGES = {
+    'price': ((None, 500), (500, 1000), (1000, 2000), (2000, None)),
+    'screen_size': ((None, 14), (14, 16), (16, None)),
+    'ram': ((None, 16), (16, 32), (32, 64), (64, None)),
+    'storage': ((None, 512), (512, 1024), (1024, 2048), (2048, None)),
+    'processor': ((None, 4), (4, 7), (7, None)),
+    'graphics_card': ((None, 3), (3, 5), (5, None)),
+}
+FACET_CACHE_TIMEOUT = 3600
+
+
+def cache_timeout():
+    return getattr(settings, 'FACET_CACHE_TIMEOUT', FACET_CACHE_TIMEOUT)
+
+
+def bucket_key(lower, upper):
+    return f"{'' if lower is None else lower}-{'' if upper is None else upper}"
+
+
+def bucket_q(field, lower, upper):
+    condition = Q()
+    if lower is not None:
+        condition &= Q(**{f"{field}__gte": lower})
+    if upper is not None:
+        condition &= Q(**{f"{field}__lt": upper})
+    return condition
+
+
+BUCKETS = {
+    field: {bucket_key(lower, upper): bucket_q(field, lower, upper) for lower, upper in ranges}
+    for field, ranges in FACET_RANGES.items()
+}
+
+
+def parse_filters(params):
+    """Return {facet: [bucket keys]} for the known buckets selected in ``params``."""
+    filters = {}
+    for field, buckets in BUCKETS.items():
+        selected = sorted({key for key in params.getlist(field) if key in buckets})
+        if selected:
+            filters[field] = selected
+    return filters
+
+
+def _facet_condition(field, keys):
+    condition = Q()
+    for key in keys:
+        condition |= BUCKETS[field][key]
+    return condition
+
+
+def _conditions(filters, exclude=None):
+    condition = Q()
+    for field, keys in filters.items():
+        if field != exclude:
+            condition &= _facet_condition(field, keys)
+    return condition
+
+
+def apply_filters(queryset, filters):
+    """OR the buckets within a facet, AND across facets."""
+    return queryset.filter(_conditions(filters))
+
+
+def _alias(field, key):
+    return f"{field}__{key}"
+
+
+def _count(condition):
+    return Count('pk', filter=condition) if condition else Count('pk')
+
+
+def count_facets(queryset, filters):
+    """Count every bucket of every facet, and the total, in a single query.
+
+    ``queryset`` is not narrowed by ``filters`` yet. Each facet's buckets are
+    counted with the other facets' filters applied but not its own, so picking
+    one price range still shows how many laptops the other ranges hold.
+    """
+    return _shape_counts(queryset.using(DEFAULT_DB_ALIAS).order_by().aggregate(**_facet_aggregates(filters)))
+
+
+async def acount_facets(queryset, filters):
+    return _shape_counts(await queryset.using(DEFAULT_DB_ALIAS).order_by().aaggregate(**_facet_aggregates(filters)))
+
+
+def _facet_aggregates(filters):
+    aggregates = {'total': _count(_conditions(filters))}
+    for field, buckets in BUCKETS.items():
+        others = _conditions(filters, exclude=field)
+        for key, condition in buckets.items():
+            aggregates[_alias(field, key)] = _count(condition & others)
+    return aggregates
+
+
+def _shape_counts(counts):
+    return {
+        'total': counts['total'],
+        'facets': {
+            field: {key: counts[_alias(field, key)] for key in buckets}
+            for field, buckets in BUCKETS.items()
+        },
+    }
+
+
+def _cache_key(store_pk, version, filters, query):
+    signature = repr((sorted(filters.items()), query)).encode()
+    digest = hashlib.md5(signature, usedforsecurity=False).hexdigest()
+    return f"facets:{store_pk}:{version}:{digest}"
+
+
+def store_facets(store_pk, queryset, filters, query=''):
+    """Cached ``count_facets`` for a store's laptops matching ``query``."""
+    if not cache_timeout():
+        return count_facets(queryset, filters)
+    key = _cache_key(store_pk, get_version('store-laptops', store_pk), filters, query)
+    counts = cache.get(key)
+    metrics.record_cache(counts is not None)
+    if counts is None:
+        counts = count_facets(queryset, filters)
+        cache.set(key, counts, timeout=cache_timeout())
+    return counts
+
+
+async def astore_facets(store_pk, queryset, filters, query=''):
+    """Async ``store_facets``."""
+    if not cache_timeout():
+        return await acount_facets(queryset, filters)
+    key = _cache_key(store_pk, await aget_version('store-laptops', store_pk), filters, query)
+    counts = await cache.aget(key)
+    metrics.record_cache(counts is not None)
+    if counts is None:
+        counts = await acount_facets(queryset, filters)
+        await cache.aset(key, counts, timeout=cache_timeout())
+    return counts
+
+
+def facet_context(counts, filters):
+    """Shape counts for templates and JSON: [{key, count, selected}] per facet."""
+    return {
+        field: [
+            {'key': key, 'count': count, 'selected': key in filters.get(field, ())}
+            for key, count in buckets.items()
+        ]
+        for field, buckets in counts['facets'].items()
+    }
@@ -14,4 +14,4 @@ class StoreForm(forms.ModelForm):
 class ReviewForm(forms.ModelForm):
     class Meta:
         model = Review
-        fields = ['comment']
\ No newline at end of file
+        fields = ['comment', 'rating']
\ No newline at end of file
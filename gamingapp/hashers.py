@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+# Password hashing policy. PASSWORD_HASHER picks the hasher new passwords (and
+# passwords re-hashed on login) use; see gaming/settings.py. The PBKDF2 work
+# factor comes from PASSWORD_PBKDF2_ITERATIONS, defaulting to Django's. Stored
+# hashes with a different iteration count still verify and are upgraded to the
+# configured count on the user's next login.
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
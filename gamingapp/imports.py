@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+import time
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from .catalog import bump_version
+from .deals import refresh_laptops
+from .forms import LaptopForm
+from .models import Laptop
+from .search import update_search_vectors
+
+# Bulk catalog import. Rows are streamed from a CSV or JSON Lines file,
+# validated with ``LaptopForm`` and written in batches: laptops of the store
+# whose ``url`` already exists are updated with ``bulk_update``, the rest are
+# inserted with ``bulk_create`` (a url listed only by other stores gets a new
+# row; their laptops are never touched), and new rows are linked to the store
+# with one insert into the ``Laptop.owner`` through table. Bulk writes bypass
+# the model signals, so the catalog versions, search vectors and the
+# BetterDeal rows of the imported laptops are brought up to date at the end.
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ('csv', 'jsonl')
+FIELDS = LaptopForm._meta.fields
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def detect_format(filename):
+    if filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or error message) from a text stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, f"Invalid JSON: {exc}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "Expected a JSON object."
+
+
+def text_stream(binary, encoding='utf-8'):
+    return io.TextIOWrapper(binary, encoding=encoding, newline='')
+
+
+@transaction.atomic
+def _write_batch(store, batch, report):
+    existing = {}
+    for laptop in Laptop.objects.filter(owner=store, url__in=batch).order_by('-pk'):
+        existing[laptop.url] = laptop
+
+    created, updated = [], []
+    for url, data in batch.items():
+        laptop = existing.get(url)
+        if laptop is None:
+            created.append(Laptop(**data))
+            continue
+        for field, value in data.items():
+            setattr(laptop, field, value)
+        updated.append(laptop)
+
+    if updated:
+        # bulk_update does not apply auto_now.
+        timestamp = now()
+        for laptop in updated:
+            laptop.updated_at = timestamp
+        Laptop.objects.bulk_update(updated, FIELDS + ['updated_at'])
+    Laptop.objects.bulk_create(created)
+
+    Laptop.owner.through.objects.bulk_create(
+        [Laptop.owner.through(laptop_id=laptop.pk, store_id=store.pk) for laptop in created],
+    )
+    update_search_vectors(Laptop, [laptop.pk for laptop in created + updated])
+    report.created += len(created)
+    report.updated += len(updated)
+    return [laptop.pk for laptop in created], [laptop.pk for laptop in updated]
+
+
+def _finish(store, created_pks, updated_pks):
+    bump_version('laptop')
+    for pk in updated_pks:
+        bump_version('laptop', pk)
+    # Updated laptops can be listed by other stores as well.
+    owners = {store.pk}
+    links = Laptop.owner.through.objects.order_by()
+    for start in range(0, len(updated_pks), BATCH_SIZE):
+        owners.update(links.filter(laptop_id__in=updated_pks[start:start + BATCH_SIZE])
+                      .values_list('store_id', flat=True).distinct())
+    for store_pk in owners:
+        bump_version('store-laptops', store_pk)
+    # Only the imported laptops' deals, in one batched pass over the dominance
+    # index; ``manage.py rebuild_better_deals`` repopulates the whole table.
+    refresh_laptops(created_pks + updated_pks)
+
+
+def import_laptops(store, rows, batch_size=BATCH_SIZE):
+    """Import (line number, row) pairs from ``read_rows`` into ``store``.
+
+    Rows with the same ``url`` as a laptop of ``store`` update it; the last
+    of several rows sharing a url within a batch wins.
+    """
+    report = ImportReport()
+    started = time.perf_counter()
+    batch = {}
+    created_pks, updated_pks = [], []
+    for line, row in rows:
+        report.rows += 1
+        if isinstance(row, str):
+            report.add_error(line, {'__all__': [row]})
+            continue
+        form = LaptopForm(data=row)
+        if not form.is_valid():
+            report.add_error(line, {field: list(messages) for field, messages in form.errors.items()})
+            continue
+        batch[form.cleaned_data['url']] = {field: form.cleaned_data[field] for field in FIELDS}
+        if len(batch) >= batch_size:
+            created, updated = _write_batch(store, batch, report)
+            created_pks += created
+            updated_pks += updated
+            batch = {}
+    if batch:
+        created, updated = _write_batch(store, batch, report)
+        created_pks += created
+        updated_pks += updated
+    if report.created or report.updated:
+        _finish(store, created_pks, updated_pks)
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,268 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueListener, RotatingFileHandler
+
+from django.utils.module_loading import import_string
+
+# Logging off the request path. ``QueueingHandler`` only renders the message
+# (lazy %-style arguments are evaluated on the calling thread, while the
+# objects they refer to are still valid) and enqueues the record; a listener
+# thread per process hands records to the real handler, which formats them and
+# writes them in batches.
+# ``SamplingFilter`` drops a share of high-frequency INFO records before they
+# are even rendered.
+
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+_FLUSH = object()
+
+
+def _level(level):
+    return level if isinstance(level, int) else logging.getLevelName(level)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra={...}`` keys are included as fields."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in ``1 / rate`` records at or below ``level`` for the configured loggers.
+
+    ``rates`` maps logger names to the share of records to keep; a name also
+    covers its child loggers and the most specific match wins. Sampling is by
+    counter rather than at random, so ``rate=0.1`` keeps exactly every tenth
+    record. Records above ``level`` always pass.
+    """
+
+    def __init__(self, rates=None, level=logging.INFO):
+        super().__init__()
+        self.level = _level(level)
+        self.every = {}
+        for name, rate in (rates or {}).items():
+            self.every[name] = 0 if rate <= 0 else max(1, round(1 / rate))
+        self.counters = {}
+
+    def _every(self, name):
+        while name:
+            if name in self.every:
+                return self.every[name]
+            name = name.rpartition('.')[0]
+        return self.every.get('', 1)
+
+    def filter(self, record):
+        if record.levelno > self.level:
+            return True
+        every = self._every(record.name)
+        if every == 1:
+            return True
+        if every == 0:
+            return False
+        counter = self.counters.get(record.name)
+        if counter is None:
+            counter = self.counters.setdefault(record.name, itertools.count())
+        return next(counter) % every == 0
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """File handler that writes ``batch_size`` records at a time.
+
+    Records at ``flush_level`` or above are written immediately. The file is
+    rotated when it would exceed ``max_bytes`` or every ``rotate_interval``
+    seconds, whichever comes first; ``0`` disables either limit.
+
+    ``{pid}`` in ``filename`` is replaced by the process id, and again in a
+    forked child. Rotation renames files that other processes may have open,
+    so processes that share a configuration, like gunicorn workers, must each
+    write their own file.
+    """
+
+    def __init__(self, filename, max_bytes=0, rotate_interval=0, backup_count=0, batch_size=100,
+                 flush_level=logging.ERROR, encoding='utf-8', delay=True):
+        self.filename_template = os.fspath(filename)
+        self._pid = os.getpid()
+        super().__init__(self._filename(), maxBytes=max_bytes, backupCount=backup_count, encoding=encoding,
+                         delay=delay)
+        self.rotate_interval = rotate_interval
+        self.rollover_at = time.time() + rotate_interval if rotate_interval else None
+        self.batch_size = batch_size
+        self.flush_level = _level(flush_level)
+        self.buffer = []
+
+    def _filename(self):
+        return self.filename_template.replace('{pid}', str(self._pid))
+
+    def _after_fork(self):
+        if self._pid == os.getpid():
+            return
+        # The parent still owns its stream and the records it buffered.
+        self._pid = os.getpid()
+        self.buffer = []
+        self.stream = None
+        self.baseFilename = os.path.abspath(self._filename())
+        if self.rotate_interval:
+            self.rollover_at = time.time() + self.rotate_interval
+
+    def emit(self, record):
+        self._after_fork()
+        try:
+            self.buffer.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.batch_size or record.levelno >= self.flush_level:
+            self.flush()
+
+    def _should_rotate(self, size):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return bool(self.maxBytes) and self.stream.tell() + size > self.maxBytes
+
+    def doRollover(self):
+        super().doRollover()
+        if self.stream is None:
+            self.stream = self._open()
+        if self.rotate_interval:
+            self.rollover_at = time.time() + self.rotate_interval
+
+    def flush(self):
+        self.acquire()
+        try:
+            self._after_fork()
+            if self.buffer:
+                data = ''.join(self.buffer)
+                self.buffer = []
+                if self.stream is None:
+                    self.stream = self._open()
+                if self._should_rotate(len(data)):
+                    self.doRollover()
+                self.stream.write(data)
+            if self.stream is not None:
+                self.stream.flush()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class BatchingQueueListener(QueueListener):
+    """Queue listener that also flushes its handlers when the queue goes idle."""
+
+    def __init__(self, queue, *handlers, flush_interval=1.0):
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get(block, timeout=self.flush_interval)
+        except queue.Empty:
+            return _FLUSH
+
+    def handle(self, record):
+        if record is not _FLUSH:
+            super().handle(record)
+            return
+        for handler in self.handlers:
+            handler.flush()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        super().stop()
+        for handler in self.handlers:
+            handler.flush()
+
+
+class QueueingHandler(logging.Handler):
+    """Hand records to ``target`` on a background thread.
+
+    ``target`` is a handler config dict: ``class`` plus constructor kwargs, as
+    in ``LOGGING['handlers']``. The formatter configured on this handler is
+    applied by the target on the listener thread. The listener is started
+    lazily and again after a fork, so it runs in every gunicorn worker, and
+    is drained by ``logging.shutdown`` at exit.
+
+    This is a plain ``Handler`` rather than a ``logging.handlers.QueueHandler``
+    because newer ``dictConfig`` versions build those with their own queue.
+    """
+
+    def __init__(self, target, flush_interval=1.0):
+        super().__init__()
+        options = dict(target)
+        self.target = import_string(options.pop('class'))(**options)
+        self.flush_interval = flush_interval
+        self.queue = None
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # First use, or forked: the parent's thread did not survive.
+            self.queue = queue.SimpleQueue()
+            self.listener = BatchingQueueListener(self.queue, self.target, flush_interval=self.flush_interval)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            self._ensure_listener()
+            self.queue.put_nowait(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        # Drain the queue: stopping the listener processes everything queued.
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener.start()
+
+    def close(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self._pid = None
+        self.target.close()
+        super().close()
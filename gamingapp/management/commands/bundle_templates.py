@@ -0,0 +1,28 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateSyntaxError, engines
+
+from gamingapp.template_registry import discover_templates
+
+
+class Command(BaseCommand):
+    help = "Compile every project template and write them to the template bundle."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.TEMPLATE_BUNDLE))
+
+    def handle(self, *args, **options):
+        engine = engines.all()[0].engine
+        bundle = {}
+        for name in sorted(discover_templates()):
+            try:
+                template = engine.get_template(name)
+            except TemplateSyntaxError as exc:
+                raise CommandError(f"{name}: {exc}")
+            bundle[name] = template.source
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(bundle, output)
+        self.stdout.write(self.style.SUCCESS(f"Bundled {len(bundle)} templates into {options['output']}."))
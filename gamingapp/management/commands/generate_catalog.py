@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gamingapp.synthetic import BATCH_SIZE, PASSWORD, generate
+
+
+class Command(BaseCommand):
+    help = "Add a synthetic catalog: users, stores, laptops with correlated specs, store links and reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--laptops', type=int, default=1000)
+        parser.add_argument('--stores', type=int, help="Defaults to one store per 100 laptops.")
+        parser.add_argument('--users', type=int, help="Defaults to one user per store, or per review.")
+        parser.add_argument('--reviews', type=int, help="At most --users; defaults to one per 10 laptops.")
+        parser.add_argument('--links-per-laptop', type=int, default=2, help="Most stores one laptop is listed in.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='synthetic-', help="Username prefix.")
+        parser.add_argument('--skip-deals', action='store_true', help="Do not rebuild the BetterDeal table.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--json', action='store_true', help="Print the counts as JSON.")
+
+    def handle(self, *args, **options):
+        laptops = options['laptops']
+        stores = options['stores'] if options['stores'] is not None else max(1, laptops // 100)
+        reviews = options['reviews'] if options['reviews'] is not None else laptops // 10
+        users = options['users'] if options['users'] is not None else max(stores, reviews)
+        if reviews > users:
+            raise CommandError(f"Each user writes one review: --reviews {reviews} needs --users >= {reviews}.")
+        try:
+            report = generate(
+                users, stores, laptops, reviews,
+                links_per_laptop=options['links_per_laptop'], seed=options['seed'], prefix=options['prefix'],
+                deals=not options['skip_deals'], batch_size=options['batch_size'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report.as_dict()))
+            return
+        counts = report.counts
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['users']} users, {counts['stores']} stores, {counts['laptops']} laptops, "
+            f"{counts['links']} store links and {counts['reviews']} reviews in {report.elapsed:.2f}s. "
+            f"Users log in with password {PASSWORD!r}."
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gamingapp.imports import BATCH_SIZE, FORMATS, detect_format, import_laptops, read_rows
+from gamingapp.models import Store
+
+
+class Command(BaseCommand):
+    help = "Import laptops into a store from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--store', type=int, required=True, help="Primary key of the store.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            store = Store.objects.get(pk=options['store'])
+        except Store.DoesNotExist:
+            raise CommandError(f"Store {options['store']} does not exist.")
+        fmt = options['format'] or detect_format(options['path'])
+        with open(options['path'], encoding='utf-8', newline='') as stream:
+            report = import_laptops(store, read_rows(stream, fmt), batch_size=options['batch_size'])
+
+        for error in report.errors:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.created + report.updated} of {report.rows} rows "
+            f"({report.created} created, {report.updated} updated, {report.error_count} errors) "
+            f"in {report.elapsed:.2f}s, {report.rows_per_second:.0f} rows/s."
+        ))
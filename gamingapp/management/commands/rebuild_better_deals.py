@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gamingapp.deals import BATCH_SIZE, rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized BetterDeal table from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = rebuild_all(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Created {created} better deals in {elapsed:.2f}s."))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gamingapp.review_stats import BATCH_SIZE, reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized review aggregates on Laptop where they drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Only report drifted laptops.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        drifted = reconcile(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        elapsed = time.perf_counter() - started
+        action = "Found" if options['dry_run'] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(drifted)} drifted laptops in {elapsed:.2f}s."))
+        if drifted and options['verbosity'] > 1:
+            self.stdout.write(', '.join(str(pk) for pk in drifted))
@@ -0,0 +1,149 @@
+import threading
+import time
+from contextvars import ContextVar
+
+# Per-process request metrics. Each thread writes to its own shard, so the
+# request path never takes a lock; shards are only summed when /metrics is
+# scraped. The lock below is taken once per thread, when its shard is created.
+
+WALL, QUERIES, DB_TIME, TEMPLATE_TIME, CACHE_HITS, CACHE_MISSES, COUNT = range(7)
+_FIELDS = 7
+
+METRICS = (
+    # (name, type, help, slot)
+    ('gaming_requests_total', 'counter', 'Requests handled.', COUNT),
+    ('gaming_request_duration_seconds_total', 'counter', 'Wall time spent in the view stack.', WALL),
+    ('gaming_db_queries_total', 'counter', 'Database queries executed.', QUERIES),
+    ('gaming_db_duration_seconds_total', 'counter', 'Time spent executing database queries.', DB_TIME),
+    ('gaming_template_render_seconds_total', 'counter', 'Time spent rendering templates.', TEMPLATE_TIME),
+    ('gaming_cache_hits_total', 'counter', 'Application cache hits.', CACHE_HITS),
+    ('gaming_cache_misses_total', 'counter', 'Application cache misses.', CACHE_MISSES),
+)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'template_time', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+_current = ContextVar('gaming_request_stats', default=None)
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_stats():
+    return _current.get()
+
+
+def record_cache(hit):
+    stats = _current.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+def record_template(duration):
+    stats = _current.get()
+    if stats is not None:
+        stats.template_time += duration
+
+
+def query_timer(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook counting queries and their time."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, view, wall, stats):
+        shard = self._shard()
+        values = shard.get(view)
+        if values is None:
+            values = shard[view] = [0] * _FIELDS
+        values[WALL] += wall
+        values[QUERIES] += stats.queries
+        values[DB_TIME] += stats.db_time
+        values[TEMPLATE_TIME] += stats.template_time
+        values[CACHE_HITS] += stats.cache_hits
+        values[CACHE_MISSES] += stats.cache_misses
+        values[COUNT] += 1
+
+    def snapshot(self):
+        with self._lock:
+            shards = list(self._shards)
+        totals = {}
+        for shard in shards:
+            for view, values in list(shard.items()):
+                summed = totals.setdefault(view, [0] * _FIELDS)
+                for slot, value in enumerate(values):
+                    summed[slot] += value
+        return totals
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(snapshot=None, extra=()):
+    """Render the registry in the Prometheus text exposition format.
+
+    ``extra`` is an iterable of (name, type, help, {labels: value}) tuples for
+    gauges owned by other modules.
+    """
+    snapshot = registry.snapshot() if snapshot is None else snapshot
+    lines = []
+    for name, kind, help_text, slot in METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for view in sorted(snapshot):
+            lines.append(f'{name}{{view="{_label(view)}"}} {snapshot[view][slot]}')
+    for name, kind, help_text, samples in extra:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples.items():
+            rendered = ','.join(f'{key}="{_label(val)}"' for key, val in labels)
+            lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+    return '\n'.join(lines) + '\n'
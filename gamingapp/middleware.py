@@ -0,0 +1,117 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics, routers
+
+
+class MetricsMiddleware:
+    """Record wall time, query count, DB and template time per URL name.
+
+    Place it first in MIDDLEWARE so the timings cover the whole stack. With
+    ``METRICS_SERVER_TIMING`` enabled the numbers are also sent back in a
+    ``Server-Timing`` header. Queries are counted by ``metrics.query_timer``,
+    which ``gamingapp.signals`` installs on every database connection.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', False)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            wall = time.perf_counter() - started
+            metrics.end_request(token)
+        return self.finish(request, response, wall, stats)
+
+    async def __acall__(self, request):
+        stats, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            wall = time.perf_counter() - started
+            metrics.end_request(token)
+        return self.finish(request, response, wall, stats)
+
+    def finish(self, request, response, wall, stats):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else '<unresolved>'
+        metrics.registry.record(view, wall, stats)
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'total;dur={wall * 1000:.2f}, '
+                f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+                f'tpl;dur={stats.template_time * 1000:.2f}'
+            )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Pin writes, and reads shortly after a client's write, to the primary.
+
+    Other requests read from one replica throughout, see
+    ``gamingapp.routers``. After a non-safe request the client gets a
+    cookie that keeps its reads on the primary for
+    ``REPLICA_STICKINESS_SECONDS``, longer than the expected replication lag.
+    """
+
+    COOKIE_NAME = 'db_primary'
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.stickiness = getattr(settings, 'REPLICA_STICKINESS_SECONDS', 10)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _writes(self, request):
+        return request.method not in self.SAFE_METHODS
+
+    def _pin(self, request):
+        if self._writes(request) or self.COOKIE_NAME in request.COOKIES:
+            return routers.pin_to_primary()
+        return routers.pick_replica()
+
+    def _finish(self, request, response, token):
+        routers.unpin(token)
+        if self._writes(request):
+            response.set_cookie(self.COOKIE_NAME, '1', max_age=self.stickiness, httponly=True, samesite='Lax')
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = self._pin(request)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            routers.unpin(token)
+            raise
+        return self._finish(request, response, token)
+
+    async def __acall__(self, request):
+        token = self._pin(request)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            routers.unpin(token)
+            raise
+        return self._finish(request, response, token)
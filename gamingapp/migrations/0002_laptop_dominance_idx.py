@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamingapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='laptop',
+            index=models.Index(fields=['price', 'ram', 'storage', 'processor', 'graphics_card', 'screen_size'], name='laptop_dominance_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamingapp', '0002_laptop_dominance_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BetterDeal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('alternative', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gamingapp.laptop')),
+                ('laptop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='better_deals', to='gamingapp.laptop')),
+            ],
+            options={
+                'ordering': ['price', 'alternative_id'],
+                'indexes': [models.Index(fields=['laptop', 'price', 'alternative'], name='better_deal_lookup_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='betterdeal',
+            constraint=models.UniqueConstraint(fields=('laptop', 'alternative'), name='better_deal_unique_pair'),
+        ),
+    ]
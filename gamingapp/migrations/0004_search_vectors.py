@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:12
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# GIN indexes and the initial backfill only make sense on PostgreSQL; other
+# backends use the in-memory fallback in gamingapp.search.
+
+SEARCH_INDEXES = (
+    ('gamingapp_store', 'store_search_vector_gin'),
+    ('gamingapp_laptop', 'laptop_search_vector_gin'),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.search import SearchVector
+
+    for table, name in SEARCH_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (search_vector)')
+
+    Store = apps.get_model('gamingapp', 'Store')
+    Laptop = apps.get_model('gamingapp', 'Laptop')
+    Store.objects.update(
+        search_vector=SearchVector('title', weight='A', config='simple')
+        + SearchVector('description', weight='B', config='simple'),
+    )
+    Laptop.objects.update(search_vector=SearchVector('name', weight='A', config='simple'))
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, name in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamingapp', '0003_betterdeal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laptop',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:10
+
+import django.core.validators
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    Laptop = apps.get_model('gamingapp', 'Laptop')
+    Review = apps.get_model('gamingapp', 'Review')
+    reviews = Review.objects.filter(laptop=OuterRef('pk')).order_by().values('laptop')
+
+    def subquery(aggregate, output_field=None):
+        expression = Subquery(reviews.annotate(value=aggregate).values('value')[:1], output_field=output_field)
+        return expression if output_field is None else Coalesce(expression, Value(0), output_field=output_field)
+
+    Laptop.objects.filter(reviews__isnull=False).update(
+        review_count=subquery(Count('pk'), IntegerField()),
+        last_reviewed_at=subquery(Max('created_at')),
+        rating_count=subquery(Count('rating'), IntegerField()),
+        rating_sum=subquery(Sum('rating'), IntegerField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamingapp', '0005_store_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='rating',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AddField(
+            model_name='laptop',
+            name='last_reviewed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='laptop',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='laptop',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='laptop',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='laptop',
+            index=models.Index(fields=['-review_count', '-id'], name='laptop_popularity_idx'),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+    ]
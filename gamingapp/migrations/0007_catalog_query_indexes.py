@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+# Laptop.owner's auto-created through table only has (laptop_id, store_id)
+# unique and single-column indexes; store listings filter on store_id and join
+# on laptop_id, which this index answers without touching the table.
+OWNER_INDEX = 'laptop_owner_store_laptop_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamingapp', '0006_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='laptop',
+            name='laptop_dominance_idx',
+        ),
+        migrations.AddIndex(
+            model_name='laptop',
+            index=models.Index(fields=['price', 'ram', 'storage', 'processor', 'graphics_card', 'screen_size'], include=('id',), name='laptop_dominance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laptop',
+            index=models.Index(fields=['-created_at', '-id'], name='laptop_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laptop',
+            index=models.Index(fields=['url'], name='laptop_url_idx'),
+        ),
+        migrations.RunSQL(
+            f'CREATE INDEX {OWNER_INDEX} ON gamingapp_laptop_owner (store_id, laptop_id)',
+            f'DROP INDEX {OWNER_INDEX}',
+        ),
+    ]
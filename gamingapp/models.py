@@ -1,12 +1,15 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.search import SearchVectorField
 
 class Store(models.Model):
     title = models.CharField(max_length=255)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f"{self.title} owned by {self.user.username}"
@@ -23,18 +26,79 @@ class Laptop(models.Model):
     url = models.URLField()
     created_at = models.DateTimeField(auto_now_add=True)  # DateTimeField
     updated_at = models.DateTimeField(auto_now=True)  # DateTimeField
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Review aggregates, maintained by gamingapp.review_stats.
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    last_reviewed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+
+    REVIEW_AGGREGATE_FIELDS = ('review_count', 'last_reviewed_at', 'rating_count', 'rating_sum')
 
     def __str__(self):
         return f"{self.name}"
 
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    def save(self, *args, **kwargs):
+        # The aggregates are updated in place with F() expressions; saving a
+        # laptop loaded earlier must not write its stale copies back. Deferred
+        # fields were never loaded, so they are left alone as well.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.REVIEW_AGGREGATE_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Dominance range filters ordered by price; on PostgreSQL the id is
+            # included so the k-d tree load is an index-only scan.
+            models.Index(
+                fields=['price', 'ram', 'storage', 'processor', 'graphics_card', 'screen_size'],
+                include=['id'],
+                name='laptop_dominance_idx',
+            ),
+            models.Index(fields=['-review_count', '-id'], name='laptop_popularity_idx'),
+            # Meta.ordering, used by every listing that does not pick its own.
+            models.Index(fields=['-created_at', '-id'], name='laptop_created_idx'),
+            # Upserts of the bulk import look laptops up by url.
+            models.Index(fields=['url'], name='laptop_url_idx'),
+        ]
 
 
 class Review(models.Model):
     laptop = models.ForeignKey(Laptop, on_delete=models.CASCADE, related_name='reviews')
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='reviews')
     comment = models.TextField(blank=True)
+    rating = models.PositiveSmallIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1), MaxValueValidator(5)],
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Review by {self.user.username} for {self.laptop.name}"
+
+class BetterDeal(models.Model):
+    """Materialized "cheaper and at least as good" pair, see ``gamingapp.deals``."""
+    laptop = models.ForeignKey(Laptop, on_delete=models.CASCADE, related_name='better_deals')
+    alternative = models.ForeignKey(Laptop, on_delete=models.CASCADE, related_name='+')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
 
     def __str__(self):
-        return f"Review by {self.user.username} for {self.laptop.name}"
\ No newline at end of file
+        return f"{self.alternative_id} is a better deal than {self.laptop_id}"
+
+    class Meta:
+        ordering = ['price', 'alternative_id']
+        constraints = [
+            models.UniqueConstraint(fields=['laptop', 'alternative'], name='better_deal_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['laptop', 'price', 'alternative'], name='better_deal_lookup_idx'),
+        ]
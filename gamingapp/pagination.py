@@ -0,0 +1,66 @@
+from django.db.models import Q
+
+# Keyset (cursor) pagination: instead of OFFSET, a page starts strictly after
+# the ordering key of the previous page's last row, so every page is a bounded
+# index range scan no matter how deep the client has paged.
+
+CURSOR_SEPARATOR = ','
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    return CURSOR_SEPARATOR.join(str(value) for value in values)
+
+
+def decode_cursor(cursor, converters):
+    parts = cursor.split(CURSOR_SEPARATOR)
+    if len(parts) != len(converters):
+        raise InvalidCursor(cursor)
+    try:
+        return [convert(part) for convert, part in zip(converters, parts)]
+    except (TypeError, ValueError, ArithmeticError):
+        raise InvalidCursor(cursor)
+
+
+def after(fields, values):
+    """Q object selecting rows ordered strictly after ``values`` on ``fields``."""
+    condition = Q(**{f"{fields[-1]}__gt": values[-1]})
+    for field, value in reversed(list(zip(fields[:-1], values[:-1]))):
+        condition = Q(**{f"{field}__gt": value}) | (Q(**{field: value}) & condition)
+    return condition
+
+
+class KeysetPage:
+    def __init__(self, rows, next_cursor):
+        self.rows = rows
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def keyset_page(queryset, fields, cursor_values, page_size, offset=0):
+    """Return the page of ``queryset`` (already ordered by ``fields``) after the cursor.
+
+    ``offset`` only applies to the first page, e.g. to skip a row shown elsewhere.
+    """
+    if cursor_values is not None:
+        queryset = queryset.filter(after(fields, cursor_values))
+        offset = 0
+    rows = list(queryset[offset:offset + page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(_value(last, field) for field in fields)
+    return KeysetPage(rows, next_cursor)
+
+
+def _value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
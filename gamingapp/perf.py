@@ -0,0 +1,160 @@
+import time
+import tracemalloc
+
+from django.db import connection
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from .models import Laptop, Review, Store
+
+# Request-level measurements shared by ``benchmarks/bench_catalog.py`` and the
+# performance budgets in ``conftest.py``: every GET route of the project with
+# its path parameters filled from the database, and per-route latency
+# percentiles, query count and peak traced memory.
+#
+# Latency is timed without tracemalloc, which slows allocation-heavy code
+# several times over; memory is sampled in a separate, shorter pass.
+
+# Routes that change state on GET or are not part of the catalog.
+SKIPPED_ROUTES = frozenset({'logout'})
+SKIPPED_NAMESPACES = frozenset({'admin'})
+# Search terms match the synthetic catalog (gamingapp.synthetic), so the
+# search routes are measured with result rows: every laptop name has a series,
+# every store title is "<brand> Outlet <n>".
+QUERY_PARAMS = {
+    'api-laptop-batch': {'ids': '{laptop_ids}'},
+    'api-laptop-compare': {'ids': '{laptop_ids}'},
+    'product-list': {'q': 'strix'},
+    'product-list-async': {'q': 'strix'},
+    'search-products': {'q': 'outlet'},
+    'search-products-async': {'q': 'outlet'},
+}
+# Path parameters named ``pk`` mean a different model on each route.
+PK_PARAMS = {
+    'store-detail': 'store_pk',
+    'api-store-detail': 'store_pk',
+    'api-laptop-detail': 'product_pk',
+    'api-review-detail': 'review_pk',
+}
+
+
+def sample_ids():
+    """Ids for the path parameters: a reviewed laptop, one of its stores and its reviewer.
+
+    ``owner`` is the store's owner, the user to log in as; ``laptop_ids`` lists
+    up to 20 laptops of the store for the batch endpoints.
+    """
+    review = Review.objects.order_by('pk').first()
+    if review is not None:
+        laptop_pk, user_pk = review.laptop_id, review.user_id
+    else:
+        laptop_pk = Laptop.objects.filter(owner__isnull=False).order_by('pk').values_list('pk', flat=True).first()
+        user_pk = None
+    store = Store.objects.filter(laptop=laptop_pk).order_by('pk').first() if laptop_pk else None
+    if store is None:
+        raise LookupError("The database needs a store with a laptop; run manage.py generate_catalog.")
+    laptop_ids = Laptop.objects.filter(owner=store).order_by('pk').values_list('pk', flat=True)[:20]
+    return {
+        'store_pk': store.pk,
+        'product_pk': laptop_pk,
+        'review_pk': review.pk if review else None,
+        'user_pk': user_pk or store.user_id,
+        'owner': store.user_id,
+        'laptop_ids': ','.join(map(str, laptop_ids)),
+    }
+
+
+def _patterns(patterns):
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            if entry.namespace not in SKIPPED_NAMESPACES:
+                yield from _patterns(entry.url_patterns)
+        elif isinstance(entry, URLPattern) and entry.name and entry.name not in SKIPPED_ROUTES:
+            yield entry
+
+
+def routes(ids):
+    """Yield ``(name, path, query)`` for every named route, in urlconf order."""
+    for pattern in _patterns(get_resolver().url_patterns):
+        kwargs = {}
+        for param in pattern.pattern.converters:
+            source = PK_PARAMS.get(pattern.name, param) if param == 'pk' else param
+            if ids.get(source) is None:
+                break
+            kwargs[param] = ids[source]
+        else:
+            query = {key: value.format(**ids) for key, value in QUERY_PARAMS.get(pattern.name, {}).items()}
+            yield pattern.name, reverse(pattern.name, kwargs=kwargs), query
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _get(client, path, query):
+    response = client.get(path, query)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+class QueryCounter:
+    """``connection.execute_wrapper`` that counts queries.
+
+    Unlike ``CaptureQueriesContext`` it does not depend on the size of
+    ``connection.queries_log``, which stops growing at 9000 entries under DEBUG.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(client, path, query=None, iterations=20, memory_iterations=3):
+    """Time ``iterations`` GETs of ``path`` after one warm-up request.
+
+    Returns the status code, latency percentiles in milliseconds, the number
+    of queries of one request and the largest tracemalloc peak, in bytes, of
+    ``memory_iterations`` requests.
+    """
+    query = query or {}
+    status = _get(client, path, query).status_code
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _get(client, path, query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        _get(client, path, query)
+
+    peak = 0
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            _get(client, path, query)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return {
+        'status': status,
+        'p50_ms': round(percentile(timings, 0.50), 3) if timings else None,
+        'p95_ms': round(percentile(timings, 0.95), 3) if timings else None,
+        'p99_ms': round(percentile(timings, 0.99), 3) if timings else None,
+        'mean_ms': round(sum(timings) / len(timings), 3) if timings else None,
+        'queries': queries.count,
+        'memory_peak_bytes': peak,
+    }
@@ -0,0 +1,91 @@
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from . import metrics
+from .catalog import get_versions
+
+# Whole-response caching for read-only pages, in two tiers: the per-process
+# ``local`` cache (L1) in front of the shared ``default`` cache (L2). Each page
+# declares the catalog version stamps ("tags") it depends on; their current
+# values are part of the cache key, so a write that bumps a stamp from the
+# model signals makes every dependent page miss on the next request, in every
+# worker, without deleting anything.
+
+L1_ALIAS = 'local'
+L2_ALIAS = 'default'
+
+
+def _cache_key(request, versions, user_id):
+    signature = repr((
+        request.path,
+        sorted(request.GET.lists()),
+        user_id,
+        sorted(versions.items(), key=repr),
+    )).encode()
+    return 'page:' + hashlib.md5(signature, usedforsecurity=False).hexdigest()
+
+
+def _freeze(response):
+    headers = tuple((name, value) for name, value in response.items())
+    return response.status_code, headers, response.content
+
+
+def _thaw(frozen):
+    status, headers, content = frozen
+    response = HttpResponse(content, status=status)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+def _cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+def cache_response(tags, vary_on_user=False, timeout=None):
+    """Cache a GET view's response until one of its ``tags`` is bumped.
+
+    ``tags(request, *args, **kwargs)`` returns the (namespace, pk) version
+    stamps the page depends on, see ``gamingapp.catalog``. A timeout of 0
+    (or ``RESPONSE_CACHE_TIMEOUT = 0``) turns the cache off.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            ttl = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300) if timeout is None else timeout
+            if ttl == 0 or request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            user_id = request.user.pk if vary_on_user else None
+            versions = get_versions(tags(request, *args, **kwargs))
+            key = _cache_key(request, versions, user_id)
+            local, shared = caches[L1_ALIAS], caches[L2_ALIAS]
+
+            frozen = local.get(key)
+            if frozen is None:
+                frozen = shared.get(key)
+                if frozen is not None:
+                    local.set(key, frozen)
+            metrics.record_cache(frozen is not None)
+            if frozen is not None:
+                return _thaw(frozen)
+
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+            if _cacheable(response):
+                frozen = _freeze(response)
+                shared.set(key, frozen, ttl)
+                local.set(key, frozen)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,101 @@
+from django.db.models import Count, DateTimeField, F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .catalog import bump_version
+from .models import Laptop, Review
+
+# Denormalized review aggregates on Laptop (review_count, last_reviewed_at,
+# rating_count, rating_sum) so catalog pages can sort and filter by popularity
+# without joining reviews. Review signals adjust them with single-statement
+# F() updates, which stay correct under concurrent writers; ``reconcile``
+# recomputes them from the reviews table to repair any drift.
+
+BATCH_SIZE = 1000
+
+
+def _rating_delta(rating, sign):
+    if rating is None:
+        return {}
+    return {
+        'rating_count': F('rating_count') + sign,
+        'rating_sum': F('rating_sum') + sign * rating,
+    }
+
+
+def _reviews_of_laptop():
+    return Review.objects.filter(laptop=OuterRef('pk')).order_by().values('laptop')
+
+
+def _last_reviewed_at():
+    return Subquery(_reviews_of_laptop().annotate(latest=Max('created_at')).values('latest')[:1])
+
+
+def review_added(laptop_id, rating, created_at):
+    # A review moved from another laptop can be older than this laptop's
+    # latest. GREATEST returns NULL for a NULL argument outside PostgreSQL.
+    created_at = Value(created_at, output_field=DateTimeField())
+    Laptop.objects.filter(pk=laptop_id).update(
+        review_count=F('review_count') + 1,
+        last_reviewed_at=Greatest(Coalesce('last_reviewed_at', created_at), created_at),
+        **_rating_delta(rating, 1),
+    )
+
+
+def review_removed(laptop_id, rating):
+    Laptop.objects.filter(pk=laptop_id).update(
+        review_count=F('review_count') - 1,
+        last_reviewed_at=_last_reviewed_at(),
+        **_rating_delta(rating, -1),
+    )
+
+
+def rating_changed(laptop_id, old, new):
+    if old == new:
+        return
+    Laptop.objects.filter(pk=laptop_id).update(
+        rating_count=F('rating_count') + int(new is not None) - int(old is not None),
+        rating_sum=F('rating_sum') + (new or 0) - (old or 0),
+    )
+
+
+def bump_versions(laptop_id):
+    # Review aggregates show on the laptop itself and order store listings.
+    bump_version('review-laptop', laptop_id)
+    bump_version('laptop', laptop_id)
+    for store_id in Laptop.owner.through.objects.filter(laptop_id=laptop_id).values_list('store_id', flat=True):
+        bump_version('store-laptops', store_id)
+
+
+def actual_aggregates():
+    """Subquery expressions computing each aggregate from the reviews table."""
+    def subquery(aggregate, output_field=None):
+        expression = Subquery(
+            _reviews_of_laptop().annotate(value=aggregate).values('value')[:1],
+            output_field=output_field,
+        )
+        return expression if output_field is None else Coalesce(expression, Value(0), output_field=output_field)
+
+    return {
+        'review_count': subquery(Count('pk'), IntegerField()),
+        'last_reviewed_at': subquery(Max('created_at')),
+        'rating_count': subquery(Count('rating'), IntegerField()),
+        'rating_sum': subquery(Sum('rating'), IntegerField()),
+    }
+
+
+def reconcile(batch_size=BATCH_SIZE, dry_run=False):
+    """Recompute drifted aggregates; return the ids of the laptops that were off."""
+    actual = actual_aggregates()
+    names = list(actual)
+    rows = Laptop.objects.order_by('pk').annotate(**{f'actual_{name}': expression for name, expression in actual.items()})
+    drifted = [
+        row['pk']
+        for row in rows.values('pk', *names, *(f'actual_{name}' for name in names)).iterator(chunk_size=batch_size)
+        if any(row[name] != row[f'actual_{name}'] for name in names)
+    ]
+    if not dry_run:
+        for start in range(0, len(drifted), batch_size):
+            Laptop.objects.filter(pk__in=drifted[start:start + batch_size]).update(**actual)
+        for pk in drifted:
+            bump_versions(pk)
+    return drifted
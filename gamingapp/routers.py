@@ -0,0 +1,53 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Reads go to one of settings.DATABASE_REPLICAS, writes to the primary. A
+# request is pinned to the primary when it writes (non-safe method), while the
+# client carries the stickiness cookie set after its last write, or while a
+# transaction is open on the primary, so users always read their own writes.
+# Otherwise one replica is picked per request, so a page never mixes rows from
+# replicas at different replication lag; reads outside a request pick one per
+# query.
+
+_read_alias = ContextVar('gaming_read_alias', default=None)
+
+
+def pin_to_primary():
+    return _read_alias.set(DEFAULT_DB_ALIAS)
+
+
+def pick_replica():
+    """Route this request's reads to one replica, or the primary without any."""
+    replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+    return _read_alias.set(random.choice(replicas) if replicas else DEFAULT_DB_ALIAS)
+
+
+def unpin(token):
+    _read_alias.reset(token)
+
+
+def pinned_to_primary():
+    return _read_alias.get() == DEFAULT_DB_ALIAS or connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        alias = _read_alias.get()
+        if alias is not None:
+            return alias
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
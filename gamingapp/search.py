@@ -0,0 +1,154 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import Case, F, FloatField, Value, When
+
+from .catalog import get_version
+from .models import Laptop, Store
+
+# Full-text search over the catalog. On PostgreSQL each searchable model keeps
+# a weighted ``search_vector`` column (GIN indexed, refreshed from signals) and
+# queries are prefix-matching tsqueries ranked with ts_rank. Other databases,
+# SQLite in tests included, fall back to an in-process inverted index that is
+# rebuilt whenever the model's catalog version moves.
+
+SEARCH_CONFIG = 'simple'
+SEARCH_FIELDS = {
+    Store: (('title', 'A'), ('description', 'B')),
+    Laptop: (('name', 'A'),),
+}
+# ts_rank's default weights for A, B, C and D.
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+FALLBACK_LIMIT = 1000
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or '').lower())
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def search_vector(model):
+    vector = None
+    for field, weight in SEARCH_FIELDS[model]:
+        part = SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_vector(instance):
+    if uses_postgres():
+        type(instance).objects.filter(pk=instance.pk).update(search_vector=search_vector(type(instance)))
+
+
+def update_search_vectors(model, pks):
+    """Bulk counterpart of ``update_search_vector`` for rows written without signals."""
+    if uses_postgres() and pks:
+        model.objects.filter(pk__in=pks).update(search_vector=search_vector(model))
+
+
+def prefix_query(terms):
+    return SearchQuery(' & '.join(f"{term}:*" for term in terms), search_type='raw', config=SEARCH_CONFIG)
+
+
+class InvertedIndex:
+    """Token -> {document id: score} postings with prefix lookup."""
+
+    def __init__(self, documents):
+        postings = defaultdict(lambda: defaultdict(float))
+        for pk, fields in documents:
+            for text, weight in fields:
+                for token in tokenize(text):
+                    postings[token][pk] += weight
+        self.postings = {token: dict(docs) for token, docs in postings.items()}
+        self.tokens = sorted(self.postings)
+
+    def _prefixed(self, term):
+        start = bisect.bisect_left(self.tokens, term)
+        for token in self.tokens[start:]:
+            if not token.startswith(term):
+                break
+            yield token
+
+    def search(self, terms):
+        """Return (id, score) pairs matching every term, best first."""
+        scores = None
+        for term in terms:
+            matches = defaultdict(float)
+            for token in self._prefixed(term):
+                for pk, score in self.postings[token].items():
+                    matches[pk] += score
+            if scores is None:
+                scores = matches
+            else:
+                scores = {pk: scores[pk] + score for pk, score in matches.items() if pk in scores}
+            if not scores:
+                return []
+        return sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+
+
+class _FallbackIndexes:
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, model):
+        namespace = model._meta.model_name
+        version = get_version(namespace)
+        cached = self._indexes.get(namespace)
+        if cached is None or cached[0] != version:
+            with self._lock:
+                cached = self._indexes.get(namespace)
+                if cached is None or cached[0] != version:
+                    cached = (version, self._build(model))
+                    self._indexes[namespace] = cached
+        return cached[1]
+
+    def _build(self, model):
+        fields = SEARCH_FIELDS[model]
+        names = [field for field, _ in fields]
+        rows = model.objects.using(DEFAULT_DB_ALIAS).order_by().values_list('pk', *names).iterator(chunk_size=2000)
+        return InvertedIndex(
+            (row[0], [(text, WEIGHTS[weight]) for text, (_, weight) in zip(row[1:], fields)])
+            for row in rows
+        )
+
+
+fallback_indexes = _FallbackIndexes()
+
+
+def search(queryset, query):
+    """Filter ``queryset`` to documents matching ``query``, best match first.
+
+    Every result is annotated with ``search_rank``.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+    if uses_postgres():
+        tsquery = prefix_query(terms)
+        return queryset.filter(search_vector=tsquery).annotate(
+            search_rank=SearchRank(F('search_vector'), tsquery),
+        ).order_by('-search_rank', 'pk')
+
+    ranked = fallback_indexes.get(queryset.model).search(terms)
+    if queryset.query.has_filters():
+        allowed = set(queryset.values_list('pk', flat=True))
+        ranked = [(pk, score) for pk, score in ranked if pk in allowed]
+    ranked = ranked[:FALLBACK_LIMIT]
+    if not ranked:
+        return queryset.none()
+    return queryset.filter(pk__in=[pk for pk, _ in ranked]).annotate(
+        search_rank=Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in ranked],
+            output_field=FloatField(),
+        ),
+    ).order_by('-search_rank', 'pk')
@@ -0,0 +1,146 @@
+from django.contrib.auth.models import Group
+from django.core.signals import request_finished, request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import db_pool, metrics, review_stats
+from .auth_backends import forget_all_users, forget_user
+from .catalog import bump_version
+from .deals import refresh_laptop
+from .models import Laptop, Review, Store, User
+from .search import update_search_vector
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # Installed per connection rather than per request so queries run from
+    # sync_to_async threads are attributed to the request as well.
+    if metrics.query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.query_timer)
+    db_pool.connection_opened(connection)
+
+
+@receiver(request_started)
+def track_request_started(sender, **kwargs):
+    db_pool.request_started()
+
+
+@receiver(request_finished)
+def track_request_finished(sender, **kwargs):
+    db_pool.request_finished()
+
+
+def bump_store_laptops(store_ids):
+    for store_id in store_ids:
+        bump_version('store-laptops', store_id)
+
+
+@receiver(post_save, sender=Laptop)
+def laptop_saved(sender, instance, created=False, raw=False, **kwargs):
+    bump_version('laptop')
+    bump_version('laptop', instance.pk)
+    if not created:
+        # A brand new laptop belongs to no store until Laptop.owner is set.
+        bump_store_laptops(instance.owner.values_list('pk', flat=True))
+    if not raw:
+        refresh_laptop(instance)
+        update_search_vector(instance)
+
+
+@receiver(pre_delete, sender=Laptop)
+def laptop_deleting(sender, instance, **kwargs):
+    instance._store_ids = list(instance.owner.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Laptop)
+def laptop_deleted(sender, instance, **kwargs):
+    # BetterDeal rows on both sides are removed by the foreign key cascade.
+    bump_version('laptop')
+    bump_version('laptop', instance.pk)
+    bump_version('deals')
+    bump_store_laptops(getattr(instance, '_store_ids', ()))
+
+
+@receiver(m2m_changed, sender=Laptop.owner.through)
+def laptop_owners_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # instance is a Store whose laptop set changed.
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            bump_store_laptops([instance.pk])
+        return
+    if action == 'pre_clear':
+        instance._store_ids = list(instance.owner.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        bump_store_laptops(getattr(instance, '_store_ids', ()))
+    elif action in ('post_add', 'post_remove'):
+        bump_store_laptops(pk_set or ())
+
+
+@receiver(post_save, sender=Store)
+def store_saved(sender, instance, raw=False, **kwargs):
+    bump_version('store')
+    bump_version('store', instance.pk)
+    if not raw:
+        update_search_vector(instance)
+
+
+@receiver(post_delete, sender=Store)
+def store_deleted(sender, instance, **kwargs):
+    bump_version('store')
+    bump_version('store', instance.pk)
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._previous = Review.objects.filter(pk=instance.pk).values('laptop_id', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        previous = getattr(instance, '_previous', None)
+        if created or previous is None:
+            review_stats.review_added(instance.laptop_id, instance.rating, instance.created_at)
+        elif previous['laptop_id'] != instance.laptop_id:
+            review_stats.review_removed(previous['laptop_id'], previous['rating'])
+            review_stats.review_added(instance.laptop_id, instance.rating, instance.created_at)
+            review_stats.bump_versions(previous['laptop_id'])
+        else:
+            review_stats.rating_changed(instance.laptop_id, previous['rating'], instance.rating)
+    review_stats.bump_versions(instance.laptop_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    review_stats.review_removed(instance.laptop_id, instance.rating)
+    review_stats.bump_versions(instance.laptop_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    forget_user(instance.pk)
+    # Pages print usernames; a login only touches last_login.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_version('user')
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_access_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # instance is a Group or Permission held by any number of users.
+        forget_all_users()
+    else:
+        forget_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        forget_all_users()
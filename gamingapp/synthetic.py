@@ -0,0 +1,190 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+
+from .catalog import bump_version
+from .deals import rebuild_all
+from .models import Laptop, Review, Store
+from .search import update_search_vectors
+
+# Synthetic catalogs for benchmarks and performance tests. Every laptop gets a
+# hidden "tier" in [0, 1] that drives its processor, graphics card, RAM,
+# storage and price together (with noise), so dominance, facets and price
+# ordering see the same kind of overlap as a real catalog. Rows are written
+# with ``bulk_create`` in batches; like ``gamingapp.imports``, the signals are
+# bypassed and the review aggregates, search vectors, catalog versions and
+# BetterDeal table are brought up to date once at the end.
+#
+# Review.user is one-to-one, so there are never more reviews than users.
+# Usernames and laptop urls are numbered after the largest existing primary
+# key, which never goes back down, so a later run cannot reuse a number even
+# after rows were deleted.
+
+BATCH_SIZE = 5000
+PASSWORD = 'synthetic-Password-123'
+SCREEN_SIZES = (13.3, 14.0, 15.6, 16.0, 17.3)
+RAM = (4, 8, 16, 32, 64)
+STORAGE = (256, 512, 1024, 2048)
+BRANDS = ('Acer', 'Asus', 'Dell', 'HP', 'Lenovo', 'MSI', 'Razer', 'Gigabyte')
+SERIES = ('Nitro', 'Strix', 'Legion', 'Omen', 'Predator', 'Katana', 'Blade', 'Aorus', 'Victus')
+COMMENTS = (
+    'Runs everything I play on high.', 'Loud fans under load.', 'Great value for the money.',
+    'Battery life is short.', 'Screen is bright and sharp.', 'Gets hot after an hour.',
+)
+RATING_WEIGHTS = (1, 2, 4, 6, 4)
+
+
+class SyntheticReport:
+    def __init__(self):
+        self.counts = {'users': 0, 'stores': 0, 'laptops': 0, 'links': 0, 'reviews': 0}
+        self.elapsed = 0.0
+
+    def as_dict(self):
+        return {**self.counts, 'elapsed': round(self.elapsed, 3)}
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def _pick(choices, tier, rng, spread=0.8):
+    index = round(tier * (len(choices) - 1) + rng.gauss(0, spread))
+    return choices[_clamp(index, 0, len(choices) - 1)]
+
+
+def synthetic_laptop(rng, number):
+    tier = rng.betavariate(2, 3)
+    processor = _clamp(round(1 + tier * 8 + rng.gauss(0, 0.7)), 1, 9)
+    graphics_card = _clamp(round(1 + tier * 8 + rng.gauss(0, 1.0)), 1, 9)
+    price = (300 + 2700 * tier) * rng.lognormvariate(0, 0.15)
+    return Laptop(
+        name=f"{rng.choice(BRANDS)} {rng.choice(SERIES)} {number}",
+        screen_size=rng.choice(SCREEN_SIZES),
+        price=Decimal(f'{price:.2f}'),
+        processor=processor,
+        graphics_card=graphics_card,
+        ram=_pick(RAM, tier, rng),
+        storage=_pick(STORAGE, tier, rng),
+        url=f'https://example.com/laptops/{number}',
+    )
+
+
+def _batches(count, batch_size):
+    for start in range(0, count, batch_size):
+        yield start, min(batch_size, count - start)
+
+
+def _next_number(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _create_users(count, prefix, batch_size):
+    start = _next_number(User)
+    password = make_password(PASSWORD)
+    pks = []
+    for offset, size in _batches(count, batch_size):
+        users = User.objects.bulk_create(
+            User(username=f'{prefix}{start + offset + i}', password=password) for i in range(size)
+        )
+        pks.extend(user.pk for user in users)
+    return pks
+
+
+def _create_stores(count, user_pks, rng, batch_size):
+    pks = []
+    for offset, size in _batches(count, batch_size):
+        stores = Store.objects.bulk_create(
+            Store(title=f"{rng.choice(BRANDS)} Outlet {offset + i}", user_id=rng.choice(user_pks))
+            for i in range(size)
+        )
+        pks.extend(store.pk for store in stores)
+    update_search_vectors(Store, pks)
+    return pks
+
+
+def _create_laptops(count, store_pks, links_per_laptop, rng, batch_size, report):
+    start = _next_number(Laptop)
+    pks = []
+    for offset, size in _batches(count, batch_size):
+        laptops = Laptop.objects.bulk_create(synthetic_laptop(rng, start + offset + i) for i in range(size))
+        batch_pks = [laptop.pk for laptop in laptops]
+        links = [
+            Laptop.owner.through(laptop_id=pk, store_id=store_pk)
+            for pk in batch_pks
+            for store_pk in rng.sample(store_pks, rng.randint(1, min(links_per_laptop, len(store_pks))))
+        ]
+        Laptop.owner.through.objects.bulk_create(links)
+        update_search_vectors(Laptop, batch_pks)
+        report.counts['links'] += len(links)
+        pks.extend(batch_pks)
+    return pks
+
+
+def _create_reviews(user_pks, laptop_pks, rng, batch_size):
+    # A few laptops collect most of the reviews, as in a real catalog.
+    aggregates = {}
+    for offset, size in _batches(len(user_pks), batch_size):
+        reviews = Review.objects.bulk_create(
+            Review(
+                laptop_id=laptop_pks[int(len(laptop_pks) * rng.random() ** 3)],
+                user_id=user_pk,
+                comment=rng.choice(COMMENTS),
+                rating=rng.choices(range(1, 6), RATING_WEIGHTS)[0],
+            )
+            for user_pk in user_pks[offset:offset + size]
+        )
+        for review in reviews:
+            laptop = aggregates.get(review.laptop_id)
+            if laptop is None:
+                laptop = aggregates[review.laptop_id] = Laptop(pk=review.laptop_id)
+            laptop.review_count += 1
+            laptop.rating_count += 1
+            laptop.rating_sum += review.rating
+            laptop.last_reviewed_at = review.created_at
+    Laptop.objects.bulk_update(aggregates.values(), Laptop.REVIEW_AGGREGATE_FIELDS, batch_size=batch_size)
+
+
+def _bump_versions(store_pks):
+    bump_version('user')
+    bump_version('store')
+    bump_version('laptop')
+    for store_pk in store_pks:
+        bump_version('store-laptops', store_pk)
+
+
+def generate(users, stores, laptops, reviews=0, links_per_laptop=2, seed=0, prefix='synthetic-',
+             deals=True, batch_size=BATCH_SIZE):
+    """Add a synthetic catalog to the database and return a ``SyntheticReport``.
+
+    ``reviews`` is capped at ``users``; every user can log in with ``PASSWORD``.
+    The same ``seed`` on the same starting database produces the same data.
+    Pass ``deals=False`` to skip rebuilding the BetterDeal table, which grows
+    much faster than the catalog. Catalog versions are bumped once the data
+    is committed, so inside an outer transaction only when that one commits.
+    """
+    if stores and not users:
+        raise ValueError("Stores need at least one user to own them.")
+    if laptops and not stores:
+        raise ValueError("Laptops need at least one store to list them.")
+    rng = random.Random(seed)
+    report = SyntheticReport()
+    started = time.perf_counter()
+    with transaction.atomic():
+        user_pks = _create_users(users, prefix, batch_size)
+        store_pks = _create_stores(stores, user_pks, rng, batch_size)
+        laptop_pks = _create_laptops(laptops, store_pks, links_per_laptop, rng, batch_size, report)
+        reviewer_pks = rng.sample(user_pks, min(reviews, len(user_pks))) if laptop_pks else []
+        _create_reviews(reviewer_pks, laptop_pks, rng, batch_size)
+        # Bumped before commit, a stamp could be read by another worker that
+        # still sees the old rows, and would then cache them under it.
+        transaction.on_commit(lambda: _bump_versions(store_pks))
+    if deals and laptop_pks:
+        rebuild_all()
+    report.counts.update(users=len(user_pks), stores=len(store_pks), laptops=len(laptop_pks), reviews=len(reviewer_pks))
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,25 @@
+import json
+
+from django.template.loaders.locmem import Loader as LocMemLoader
+
+# Serves templates from the JSON bundle written by ``manage.py bundle_templates``.
+# The bundle is read once, when the engine builds its loaders; put this loader
+# under ``django.template.loaders.cached.Loader`` so each template is also
+# compiled only once per process.
+
+
+class BundleLoader(LocMemLoader):
+    def __init__(self, engine, bundle_path):
+        try:
+            with open(bundle_path, encoding='utf-8') as bundle:
+                templates = json.load(bundle)
+        except FileNotFoundError:
+            templates = {}
+        super().__init__(engine, templates)
+
+    def get_template_sources(self, template_name):
+        if template_name in self.templates_dict:
+            yield from super().get_template_sources(template_name)
+
+    def template_names(self):
+        return list(self.templates_dict)
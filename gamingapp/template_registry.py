@@ -0,0 +1,102 @@
+import os
+import threading
+
+from django.core import checks
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.loader import get_template
+from django.urls import URLPattern, URLResolver, get_resolver
+
+# Templates are discovered once, when the app is ready, and looked up with a
+# set membership test afterwards. The ``view_templates`` system check compiles
+# every template a routed view renders, so a missing or broken template fails
+# ``manage.py check``/``migrate``/``runserver`` instead of a live request.
+
+
+def _loader_template_names(loaders):
+    for loader in loaders:
+        yield from _loader_template_names(getattr(loader, 'loaders', ()))
+        if hasattr(loader, 'template_names'):
+            yield from loader.template_names()
+
+
+def discover_templates():
+    names = set()
+    for engine in engines.all():
+        names.update(_loader_template_names(getattr(getattr(engine, 'engine', None), 'template_loaders', ())))
+        for directory in getattr(engine, 'template_dirs', ()):
+            directory = str(directory)
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    path = os.path.relpath(os.path.join(root, filename), directory)
+                    names.add(path.replace(os.sep, '/'))
+    return frozenset(names)
+
+
+class TemplateRegistry:
+    def __init__(self):
+        self._names = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        names = discover_templates()
+        with self._lock:
+            self._names = names
+        return names
+
+    @property
+    def names(self):
+        names = self._names
+        return self.load() if names is None else names
+
+    def exists(self, template_name):
+        return template_name in self.names
+
+    def warm(self):
+        """Compile every template now so a cached loader never reads them again."""
+        for name in self.names:
+            get_template(name)
+
+
+template_registry = TemplateRegistry()
+
+
+def _routed_views(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _routed_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def view_template_names():
+    """Templates rendered by the views routed in the root URLconf."""
+    from . import views
+
+    names = set(views.FUNCTION_VIEW_TEMPLATES)
+    for callback in _routed_views(get_resolver().url_patterns):
+        view_class = getattr(callback, 'view_class', None)
+        if view_class is not None and view_class.__module__ == views.__name__:
+            template_name = getattr(view_class, 'template_name', None)
+            if template_name:
+                names.add(template_name)
+    return sorted(names)
+
+
+@checks.register(checks.Tags.templates)
+def check_view_templates(app_configs=None, **kwargs):
+    errors = []
+    for name in view_template_names():
+        if not template_registry.exists(name):
+            errors.append(checks.Error(
+                f"Template '{name}' used by a view does not exist.",
+                id='gamingapp.E001',
+            ))
+            continue
+        try:
+            get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as exc:
+            errors.append(checks.Error(
+                f"Template '{name}' could not be compiled: {exc}",
+                id='gamingapp.E002',
+            ))
+    return errors
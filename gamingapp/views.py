@@ -1,34 +1,98 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse, reverse_lazy
-from django.views.generic import CreateView, UpdateView, DeleteView, ListView, DetailView
+from django.views.generic import CreateView, UpdateView, DeleteView, ListView, DetailView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.db import DatabaseError, connection
 from .models import Store, Laptop, Review, User
 from .forms import LaptopForm, StoreForm, ReviewForm
-from django.http import Http404, HttpResponse, HttpResponseNotFound
-from django.template.loader import get_template
-from django.template import TemplateDoesNotExist
+from .deals import better_deals
+from .pagination import InvalidCursor, decode_cursor, keyset_page
+from .search import search
+from .imports import FORMATS, detect_format, import_laptops, read_rows, text_stream
+from . import exports
+from .facets import apply_filters, astore_facets, facet_context, parse_filters, store_facets
+from .db_pool import pool_metrics
+from .metrics import render_prometheus
+from .conditional import lower_prices_etag, store_etag, store_laptops_etag
+from .response_cache import cache_response
+from .template_registry import template_registry
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotFound, JsonResponse, StreamingHttpResponse
+from django.template import loader
+from django.utils.safestring import mark_safe
+from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.contrib.auth.views import LogoutView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
+import asyncio
 import logging
+import uuid
+from urllib.parse import urlencode
+from decimal import Decimal
 from django.db.models import Q
-from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
+# Templates rendered by the function views below; class-based views declare
+# theirs in ``template_name``. Both are validated at startup, see
+# ``gamingapp.template_registry``.
+FUNCTION_VIEW_TEMPLATES = (
+    'templates_with_first_record.html',
+    'templates_with_record.html',
+    'lower_price_rows.html',
+    'search_laptops.html',
+    'search_stores_users.html',
+    'search_stores.html',
+    'read_review.html',
+    'read_request_user_review.html',
+)
+
 def check_template(template_name, request):
-    try:
-        get_template(template_name)
-        logger.info(f"Template '{template_name}' found for user {request.user}.")
-        cache.set(f"template_exists_{template_name}", True, timeout=3600)
+    if template_registry.exists(template_name):
         return True
-    except TemplateDoesNotExist:
-        logger.error(f"Template '{template_name}' does not exist for user {request.user}.")
-        cache.set(f"template_exists_{template_name}", False, timeout=3600)
-        return False
+    logger.error("Template '%s' does not exist.", template_name)
+    return False
+
+def lower_prices_page_size(request):
+    default = getattr(settings, 'LOWER_PRICES_PAGE_SIZE', 50)
+    maximum = getattr(settings, 'LOWER_PRICES_MAX_PAGE_SIZE', 500)
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except ValueError:
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+def stream_template(request, template_name, context, rows_template_name, rows, chunk_size):
+    """Render ``template_name`` around ``rows``, ``chunk_size`` rows at a time.
+
+    The page is rendered once with a placeholder in its ``streamed_rows``
+    variable and split there; each chunk of ``rows`` is rendered with
+    ``rows_template_name`` as ``components``, so only one chunk is in memory.
+    """
+    page = loader.get_template(template_name)
+    rows_template = loader.get_template(rows_template_name)
+    placeholder = mark_safe(f'<!-- rows {uuid.uuid4().hex} -->')
+    head, tail = page.render({**context, 'streamed_rows': placeholder}, request).split(placeholder)
+    yield head
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield rows_template.render({**context, 'components': chunk}, request)
+            chunk = []
+    if chunk:
+        yield rows_template.render({**context, 'components': chunk}, request)
+    yield tail
+
+def stores_with_owner():
+    # Store.__str__ and the store templates print the owner's username.
+    return Store.objects.select_related('user').only(
+        'title', 'description', 'created_at', 'user__username',
+    )
 
 class SignUpView(CreateView):
     form_class = UserCreationForm
@@ -76,7 +140,7 @@ class DeleteAccountView(LoginRequiredMixin, DeleteView):
             messages.success(self.request, "Account deleted successfully.")
             return response
         except Exception as e:
-            logger.error(f"An error occurred during account deletion: {str(e)}")
+            logger.error("An error occurred during account deletion: %s", e)
             messages.error(self.request, f"An error occurred: {str(e)}")
             return redirect('delete_account')
 
@@ -114,11 +178,11 @@ class AddLaptopView(LoginRequiredMixin, CreateView):
             store = get_object_or_404(Store, pk=store_id, user=self.request.user)
             form.instance.owner = store
             response = super().form_valid(form)
-            logger.info(f"User {self.request.user} created a laptop on store {store_id}.")
+            logger.info("User %s created a laptop on store %s.", self.request.user, store_id)
 
             return response
         except Exception as e:
-            logger.error(f"Error creating laptop for store {store_id} by user {self.request.user}: {e}")
+            logger.error("Error creating laptop for store %s by user %s: %s", store_id, self.request.user, e)
             raise
 
     def get_success_url(self):
@@ -131,13 +195,33 @@ class AddLaptopView(LoginRequiredMixin, CreateView):
             return HttpResponse("Brak pliku .html")
         return super().dispatch(request, *args, **kwargs)
     
+class ImportLaptopsView(LoginRequiredMixin, View):
+    """Bulk import an uploaded CSV/JSONL file into one of the user's stores."""
+
+    def post(self, request, store_pk):
+        store = get_object_or_404(Store, pk=store_pk, user=request.user)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return JsonResponse({'error': "Missing 'file' upload."}, status=400)
+        fmt = request.POST.get('format') or detect_format(upload.name)
+        if fmt not in FORMATS:
+            return JsonResponse({'error': f"Unsupported format '{fmt}'."}, status=400)
+
+        report = import_laptops(store, read_rows(text_stream(upload.file), fmt))
+        logger.info(
+            "User %s imported %d rows into store %s (%d errors) in %.2fs.",
+            request.user, report.rows, store_pk, report.error_count, report.elapsed,
+        )
+        return JsonResponse(report.as_dict())
+
+@method_decorator(cache_response(lambda request: [('store', None), ('user', None)]), name='dispatch')
 class StoreListView(ListView):
     model = Store
     template_name = 'store_list.html'  
     context_object_name = 'stores' 
 
     def get_queryset(self):
-        return Store.objects.all()  
+        return stores_with_owner()
     
 class UpdateLaptopView(LoginRequiredMixin, UpdateView):
     model = Laptop
@@ -216,11 +300,11 @@ class AddReviewView(LoginRequiredMixin, CreateView):
             product = get_object_or_404(Laptop, pk=product_id, user=self.request.user)
             form.instance.owner = product
             response = super().form_valid(form)
-            logger.info(f"User {self.request.user} created a laptop on store {product_id}.")
+            logger.info("User %s created a laptop on store %s.", self.request.user, product_id)
 
             return response
         except Exception as e:
-            logger.error(f"Error creating laptop for store {product_id} by user {self.request.user}: {e}")
+            logger.error("Error creating laptop for store %s by user %s: %s", product_id, self.request.user, e)
             raise
 
     def get_success_url(self):
@@ -260,137 +344,326 @@ class UpdateReviewView(LoginRequiredMixin, UpdateView):
             return HttpResponse("Brak pliku .html")
         return super().dispatch(request, *args, **kwargs)
     
+@method_decorator(condition(etag_func=store_etag), name='dispatch')
+@method_decorator(cache_response(lambda request, pk: [('store', pk), ('user', None)]), name='dispatch')
 class StoreDetailView(DetailView):
     model = Store
     template_name = 'store_detail.html'
     context_object_name = 'store'
+
+    def get_queryset(self):
+        return stores_with_owner()
     
-@transaction.atomic
+@condition(etag_func=lower_prices_etag)
 def display_first_record_with_lower_price(request, store_pk, product_pk):
     if request.user.is_authenticated:
         template_name = 'templates_with_first_record.html'
         if not check_template(template_name, request):
-            logger.warning(f"Template '{template_name}' not found for user {request.user}.")
+            logger.warning("Template '%s' not found for user %s.", template_name, request.user)
             return HttpResponseNotFound("Template not found.")
 
         try:
             product = get_object_or_404(Laptop, pk=product_pk, owner__pk=store_pk)
-            first_product_with_lower_price = Laptop.objects.filter(
-                price__lt=product.price, 
-                cale__gte=product.cale, 
-                graphics_card__gte=product.graphics_card, 
-                processor__gte=product.processor, 
-                ram__gte=product.ram, 
-                rom__gte=product.rom
-            ).first()
+            deal = better_deals(product).first()
+            first_product_with_lower_price = deal.alternative if deal else None
             
-            logger.info(f"Records retrieved successfully for user {request.user}.")
+            logger.info("Records retrieved successfully for user %s.", request.user)
             return render(request, 'templates_with_first_record.html', {'component': first_product_with_lower_price})
         except Laptop.DoesNotExist:
             first_product_with_lower_price = []
-            logger.error(f"Error retrieving categories for user {request.user}")
+            logger.error("Error retrieving categories for user %s", request.user)
             messages.error(request, 'Laptop o podanym identyfikatorze nie istnieje.')
             return redirect('login')
     else:
         messages.error(request, 'Nie jesteś zalogowany.')
         return redirect('login')
     
-@transaction.atomic
+@condition(etag_func=lower_prices_etag)
 def display_second_and_subsequent_records_with_lower_prices(request, store_pk, product_pk):
     if request.user.is_authenticated:
         template_name = 'templates_with_record.html'
         if not check_template(template_name, request):
-            logger.warning(f"Template '{template_name}' not found for user {request.user}.")
+            logger.warning("Template '%s' not found for user %s.", template_name, request.user)
             return HttpResponseNotFound("Template not found.")
 
         try:
             product = get_object_or_404(Laptop, pk=product_pk, owner__pk=store_pk)
-            products_with_lower_prices = Laptop.objects.filter(
-                price__lt=product.price, 
-                cale__gte=product.cale, 
-                graphics_card__gte=product.graphics_card, 
-                processor__gte=product.processor, 
-                ram__gte=product.ram, 
-                rom__gte=product.rom
-            ).order_by('price')[1:]
-            
-            logger.info(f"Records retrieved successfully for user {request.user}.")
-            return render(request, 'templates_with_record.html', {'components': products_with_lower_prices})
+            deals = better_deals(product)
+
+            if request.GET.get('stream'):
+                if not check_template('lower_price_rows.html', request):
+                    return HttpResponseNotFound("Template not found.")
+                logger.info("Streaming records for user %s.", request.user)
+                chunk_size = getattr(settings, 'LOWER_PRICES_STREAM_CHUNK_SIZE', 500)
+                alternatives = (deal.alternative for deal in deals[1:].iterator(chunk_size=chunk_size))
+                return StreamingHttpResponse(stream_template(
+                    request, template_name, {}, 'lower_price_rows.html', alternatives, chunk_size,
+                ))
+
+            try:
+                cursor = request.GET.get('after')
+                cursor_values = decode_cursor(cursor, (Decimal, int)) if cursor else None
+            except InvalidCursor:
+                return HttpResponseBadRequest("Invalid cursor.")
+            page = keyset_page(deals, ('price', 'alternative_id'), cursor_values, lower_prices_page_size(request), offset=1)
+            products_with_lower_prices = [deal.alternative for deal in page.rows]
+
+            logger.info("Records retrieved successfully for user %s.", request.user)
+            next_querystring = None
+            if page.next_cursor:
+                query = request.GET.copy()
+                query['after'] = page.next_cursor
+                next_querystring = query.urlencode()
+            return render(request, 'templates_with_record.html', {
+                'components': products_with_lower_prices,
+                'next_cursor': page.next_cursor,
+                'next_querystring': next_querystring,
+            })
         except Laptop.DoesNotExist:
             products_with_lower_prices = []
-            logger.error(f"Error retrieving categories for user {request.user}")
+            logger.error("Error retrieving categories for user %s", request.user)
             messages.error(request, 'Laptop o podanym identyfikatorze nie istnieje.')
             return redirect('login')
     else:
         messages.error(request, 'Nie jesteś zalogowany.')
         return redirect('login')
     
-@transaction.atomic
+def laptops_page_size(request):
+    default = getattr(settings, 'LAPTOPS_PAGE_SIZE', 25)
+    maximum = getattr(settings, 'LAPTOPS_MAX_PAGE_SIZE', 200)
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except ValueError:
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+# ?sort= orderings of the store product list; by default search results are
+# ranked and plain listings keep the model ordering.
+LAPTOP_SORTS = {
+    'popular': ('-review_count', '-id'),
+}
+
+def laptops_sort(request):
+    sort = request.GET.get('sort', '')
+    return sort if sort in LAPTOP_SORTS else ''
+
+def store_laptops_query(request, store_pk):
+    query = request.GET.get('q', '').strip()
+    filters = parse_filters(request.GET)
+    products = Laptop.objects.filter(owner__pk=store_pk).defer('search_vector')
+    if query:
+        products = search(products, query)
+    sort = laptops_sort(request)
+    if sort:
+        products = products.order_by(*LAPTOP_SORTS[sort])
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    return query, filters, products, page, laptops_page_size(request)
+
+def laptops_querystring(query, filters, sort='', page_size=None):
+    params = {'q': query, **filters}
+    if sort:
+        params['sort'] = sort
+    if page_size is not None and page_size != getattr(settings, 'LAPTOPS_PAGE_SIZE', 25):
+        params['page_size'] = page_size
+    return urlencode(params, doseq=True)
+
+def facet_links(facets, query, filters, sort, page_size):
+    """Give each bucket the querystring of the current listing with that bucket toggled."""
+    for field, buckets in facets.items():
+        for bucket in buckets:
+            keys = set(filters.get(field, ())) ^ {bucket['key']}
+            toggled = {**filters, field: sorted(keys)}
+            bucket['querystring'] = laptops_querystring(query, toggled, sort, page_size)
+    return facets
+
+def store_laptops_context(query, filters, counts, page, page_size, products, sort=''):
+    return {
+        'query': query,
+        'products': products,
+        'facets': facet_links(facet_context(counts, filters), query, filters, sort, page_size),
+        'total': counts['total'],
+        'page': page,
+        'has_next': page * page_size < counts['total'],
+        'sort': sort,
+        'filter_querystring': laptops_querystring(query, filters, sort, page_size),
+    }
+
+def filter_store_laptops(request, store_pk):
+    query, filters, products, page, page_size = store_laptops_query(request, store_pk)
+    counts = store_facets(store_pk, products, filters, query)
+    offset = (page - 1) * page_size
+    page_products = apply_filters(products, filters)[offset:offset + page_size]
+    return store_laptops_context(query, filters, counts, page, page_size, page_products, laptops_sort(request))
+
+@condition(etag_func=store_laptops_etag)
+@cache_response(lambda request, store_pk: [('store-laptops', store_pk)])
 def search_laptops(request, store_pk):
     template_name = 'search_laptops.html'
     if not check_template(template_name, request):
-        logger.warning(f"Template '{template_name}' not found for user {request.user}.")
+        logger.warning("Template '%s' not found for user %s.", template_name, request.user)
         return HttpResponseNotFound("Template not found.")
 
     try:
-        products = Laptop.objects.filter(owner__pk=store_pk)
-        logger.info(f"Products retrieved successfully for user {request.user}.")
+        context = filter_store_laptops(request, store_pk)
+        logger.info("Products retrieved successfully for user %s.", request.user)
     except Exception as e:
         products = []
-        logger.error(f"Error retrieving categories for user {request.user}: {e}")
+        logger.error("Error retrieving categories for user %s: %s", request.user, e)
         return HttpResponse("An error occurred while retrieving categories.", status=500)
 
-    return render(request, template_name, {'products': products})
+    return render(request, template_name, context)
+
+def export_laptops(request, store_pk):
+    store = get_object_or_404(Store, pk=store_pk)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        return HttpResponseBadRequest(f"Unsupported format '{fmt}'.")
+    reviews = request.GET.get('reviews') in ('1', 'true')
+    compress = request.GET.get('gzip') in ('1', 'true')
+
+    filename = f'store-{store.pk}.{fmt}'
+    content_type = exports.FORMATS[fmt]
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(exports.export_store(store.pk, fmt, reviews, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def laptop_facets(request, store_pk):
+    context = filter_store_laptops(request, store_pk)
+    del context['filter_querystring'], context['sort']
+    context['products'] = list(context['products'].values(
+        'id', 'name', 'price', 'screen_size', 'processor', 'graphics_card', 'ram', 'storage', 'url',
+        'review_count', 'last_reviewed_at',
+    ))
+    return JsonResponse(context)
 
-@transaction.atomic
 def search_stores_for_request_user(request):
     template_name = 'search_stores_users.html'
     if not check_template(template_name, request):
-        logger.warning(f"Template '{template_name}' not found for user {request.user}.")
+        logger.warning("Template '%s' not found for user %s.", template_name, request.user)
         return HttpResponseNotFound("Template not found.")
     
     try:
-        products = Store.objects.filter(user=request.user)
-        logger.info(f"Products retrieved successfully for user {request.user}.")
+        products = stores_with_owner().filter(user=request.user)
+        logger.info("Products retrieved successfully for user %s.", request.user)
     except Exception as e:
         products = []
-        logger.error(f"Error retrieving categories for user {request.user}: {e}")
+        logger.error("Error retrieving categories for user %s: %s", request.user, e)
         return HttpResponse("An error occurred while retrieving categories.", status=500)
 
     return render(request, template_name, {'products': products})
 
 
-@transaction.atomic
 def search_stores(request):
     template_name = 'search_stores.html'
     if not check_template(template_name, request):
-        logger.warning(f"Template '{template_name}' not found for user {request.user}.")
+        logger.warning("Template '%s' not found for user %s.", template_name, request.user)
         return HttpResponseNotFound("Template not found.")
 
     try:
         query = request.GET.get('q', '').strip()
-        products = Store.objects.filter(Q(name__icontains=query) | Q(description__icontains=query)) if query else Store.objects.all()
-        logger.info(f"Products retrieved successfully for user {request.user}.")
+        products = search(stores_with_owner(), query) if query else stores_with_owner()
+        logger.info("Products retrieved successfully for user %s.", request.user)
     except Exception as e:
-        logger.error(f"Error retrieving categories for user {request.user}: {e}")
+        logger.error("Error retrieving categories for user %s: %s", request.user, e)
         products = []
         return HttpResponse("An error occurred while retrieving categories.", status=500)
     
     return render(request, template_name, {'products': products, 'query': query})
 
+def review_tags(request, product_pk, user_pk=None):
+    return [('review-laptop', product_pk), ('laptop', product_pk), ('user', None)]
+
+@cache_response(review_tags)
 def review_view(request, product_pk, user_pk):
     template_name = 'read_review.html'
 
     user = get_object_or_404(User, pk=user_pk)
     laptop = get_object_or_404(Laptop, pk=product_pk)
-    review = Review.objects.filter(user=user, laptop=laptop)
+    review = Review.objects.filter(user=user, laptop=laptop).select_related('user', 'laptop')
     return render(request, template_name, {'review': review})
 
+@cache_response(review_tags, vary_on_user=True)
 def review_request_user_view(request, product_pk):
     template_name = 'read_request_user_review.html'
 
     user = request.user
     laptop = get_object_or_404(Laptop, pk=product_pk)
-    review = Review.objects.filter(user=user, laptop=laptop)
+    review = Review.objects.filter(user=user, laptop=laptop).select_related('user', 'laptop')
     return render(request, template_name, {'review': review})
 
+def metrics_view(request):
+    return HttpResponse(render_prometheus(extra=pool_metrics()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Async variants of the read-only catalog pages, served under /async/ when the
+# project runs on ASGI. Independent queries are awaited together; templates are
+# rendered from fully evaluated lists so rendering never touches the database.
+
+async def search_laptops_async(request, store_pk):
+    template_name = 'search_laptops.html'
+    if not check_template(template_name, request):
+        return HttpResponseNotFound("Template not found.")
+
+    if request.GET.get('q', '').strip():
+        # The in-memory search fallback may query while building its index.
+        query, filters, products, page, page_size = await sync_to_async(store_laptops_query)(request, store_pk)
+    else:
+        query, filters, products, page, page_size = store_laptops_query(request, store_pk)
+    offset = (page - 1) * page_size
+    page_products = apply_filters(products, filters)[offset:offset + page_size]
+    counts, page_products = await asyncio.gather(
+        astore_facets(store_pk, products, filters, query),
+        alist(page_products),
+    )
+    context = store_laptops_context(query, filters, counts, page, page_size, page_products, laptops_sort(request))
+    return render(request, template_name, context)
+
+async def search_stores_async(request):
+    template_name = 'search_stores.html'
+    if not check_template(template_name, request):
+        return HttpResponseNotFound("Template not found.")
+
+    query = request.GET.get('q', '').strip()
+    if query:
+        products = await sync_to_async(search)(stores_with_owner(), query)
+    else:
+        products = stores_with_owner()
+    return render(request, template_name, {'products': await alist(products), 'query': query})
+
+async def review_view_async(request, product_pk, user_pk):
+    template_name = 'read_review.html'
+
+    user, laptop = await asyncio.gather(
+        aget_object_or_404(User, pk=user_pk),
+        aget_object_or_404(Laptop, pk=product_pk),
+    )
+    review = Review.objects.filter(user=user, laptop=laptop).select_related('user', 'laptop')
+    return render(request, template_name, {'review': await alist(review)})
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+async def aget_object_or_404(model, **kwargs):
+    try:
+        return await model.objects.aget(**kwargs)
+    except model.DoesNotExist:
+        raise Http404(f"No {model._meta.object_name} matches the given query.")
+
+def liveness(request):
+    return HttpResponse("ok", content_type='text/plain')
+
+def readiness(request):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError as e:
+        logger.error("Readiness check failed: %s", e)
+        return HttpResponse("database unavailable", status=503, content_type='text/plain')
+    if not template_registry.names:
+        return HttpResponse("templates unavailable", status=503, content_type='text/plain')
+    return HttpResponse("ok", content_type='text/plain')